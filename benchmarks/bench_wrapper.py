@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare the schalter call shim with the wrapper that was used before: the
+previous call logic wrapped with the `decorator` package (decoration time and
+per-call latency, unscoped functions with all arguments configured).
+
+    python benchmarks/bench_wrapper.py
+"""
+
+import timeit
+
+from schalter import Schalter
+
+try:
+    from decorator import decorate
+except ImportError:
+    decorate = None
+
+
+def make_function(n_kwonly: int):
+    args = ", ".join("a{}={}".format(i, i) for i in range(n_kwonly))
+    namespace = {}
+    exec("def f(x, *, {}):\n    return x\n".format(args), namespace)
+    return namespace["f"]
+
+
+class _Default:
+    def __init__(self, value):
+        self.value = value
+
+
+class _LegacyConfig:
+    """ The parts of the previous `Schalter` that its call wrapper used. """
+
+    class _Scope:
+        fullname = ""
+
+    def __init__(self, values: dict):
+        self.config = dict(values)
+        self._scope = self._Scope()
+
+    def set_manual(self, param: str, value):
+        self.config[param] = value
+
+
+def legacy_caller(self, mapping):
+    # the previous `make_call_decorated_function`, unchanged
+    def call_decorated_function(f, *args, **kw):
+        # save all supplied args that are marked as to be configured
+        # this first line also contains default values
+        manual_params = set(kw.keys()).intersection(mapping.keys())
+        # filter out all params that are actually default values
+        if f.__kwdefaults__ is not None:
+            supplied_by_default = set(
+                p
+                for p in manual_params
+                if (p in f.__kwdefaults__ and kw[p] is f.__kwdefaults__[p])
+            )
+        else:
+            supplied_by_default = set()
+
+        manual_params = manual_params - supplied_by_default
+
+        current_scope = self._scope.fullname
+        scoped_mapping = {
+            k: (current_scope + "/" + v[0] if v[2] else v[0], v[1])
+            for k, v in mapping.items()
+        }
+
+        for p in manual_params:
+            self.set_manual(scoped_mapping[p][0], kw[p])
+
+        kwargs_to_add = mapping.keys() - manual_params
+        try:
+            kw.update({k: self.config[scoped_mapping[k][0]] for k in kwargs_to_add})
+        except KeyError as e:
+            raise KeyError("Value missing in configuration: {}.".format(str(e)))
+
+        if f.__kwdefaults__ is not None:
+            default_values = {
+                k: v.value
+                for k, v in kw.items()
+                if k in mapping
+                and k in f.__kwdefaults__
+                and v is f.__kwdefaults__[k]
+            }
+            kw.update(default_values)
+        return f(*args, **kw)
+
+    return call_decorated_function
+
+
+def legacy_configure(f, config: _LegacyConfig):
+    # the previous decoration (without registering the defaults): defaults are
+    # replaced by proxies and the function is wrapped with `decorator.decorate`
+    m = {k: (k, v, False) for k, v in f.__kwdefaults__.items()}
+    f.__kwdefaults__ = {k: _Default(v[1]) for k, v in m.items()}
+    return decorate(f, legacy_caller(config, m))
+
+
+def best_of(stmt, number: int, repeat: int = 5) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    for n_kwonly in (1, 8, 32):
+        Schalter.clear()
+        functions = [make_function(n_kwonly) for _ in range(200)]
+        it = iter(functions)
+        t_decorate = best_of(lambda: Schalter.configure(next(it)), 200, 1)
+        configured = Schalter.configure(make_function(n_kwonly))
+        t_call = best_of(lambda: configured(0), 20000)
+        print(
+            "schalter  n_kwonly={:3d}  decorate {:8.2f} us  call {:6.3f} us".format(
+                n_kwonly, t_decorate * 1e6, t_call * 1e6
+            )
+        )
+
+        if decorate is None:
+            continue
+        legacy_config = _LegacyConfig({"a{}".format(i): i for i in range(n_kwonly)})
+        functions = [make_function(n_kwonly) for _ in range(200)]
+        it = iter(functions)
+        t_decorate = best_of(lambda: legacy_configure(next(it), legacy_config), 200, 1)
+        legacy = legacy_configure(make_function(n_kwonly), legacy_config)
+        t_call = best_of(lambda: legacy(0), 20000)
+        print(
+            "decorator n_kwonly={:3d}  decorate {:8.2f} us  call {:6.3f} us".format(
+                n_kwonly, t_decorate * 1e6, t_call * 1e6
+            )
+        )
+
+    if decorate is None:
+        print("'decorator' package not installed: no comparison.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for decoration, call dispatch, scoping and config I/O.
+
+Results are written as JSON so that runs of different commits can be compared:
+
+    python benchmarks/run_benchmarks.py -o before.json
+    python benchmarks/run_benchmarks.py -o after.json
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import logging
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from schalter import Schalter
+
+BENCHMARKS = []
+
+
+def benchmark(**params):
+    """ Register a benchmark for every combination of the given parameters. """
+
+    def _decorator(f):
+        BENCHMARKS.append((f, params))
+        return f
+
+    return _decorator
+
+
+def make_function(n_kwonly: int, with_defaults: bool = True):
+    if with_defaults:
+        args = ", ".join("a{0}={0}".format(i) for i in range(n_kwonly))
+    else:
+        args = ", ".join("a{}".format(i) for i in range(n_kwonly))
+    namespace = {}
+    exec("def f(x, *, {}):\n    return x\n".format(args), namespace)
+    return namespace["f"]
+
+
+def best_of(stmt, number: int, repeat: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+@benchmark(n_kwonly=[1, 8, 64, 256], scoped=[False, True])
+def decorate(n_kwonly: int, scoped: bool, quick: bool):
+    number = 20 if quick else 100
+    Schalter.clear()
+    functions = iter([make_function(n_kwonly) for _ in range(number * 3)])
+    d = Schalter.scoped_configure if scoped else Schalter.configure
+    return best_of(lambda: d(next(functions)), number, 3)
+
+
+@benchmark(n_kwonly=[1, 8, 64], decorated=[False, True])
+def call(n_kwonly: int, decorated: bool, quick: bool):
+    Schalter.clear()
+    f = make_function(n_kwonly)
+    if decorated:
+        f = Schalter.configure(f)
+    return best_of(lambda: f(0), 2000 if quick else 50000, 5)
+
+
+@benchmark(n_kwonly=[1, 8, 64])
+def call_bound(n_kwonly: int, quick: bool):
+    Schalter.clear()
+    f = Schalter.bind(Schalter.configure(make_function(n_kwonly)))
+    return best_of(lambda: f(0), 2000 if quick else 50000, 5)
+
+
+@benchmark(n_kwonly=[1, 8], supplied=[1])
+def call_with_override(n_kwonly: int, supplied: int, quick: bool):
+    Schalter.clear()
+    f = Schalter.configure(make_function(n_kwonly))
+    kw = {"a{}".format(i): i for i in range(supplied)}
+    return best_of(lambda: f(0, **kw), 2000 if quick else 50000, 5)
+
+
+@benchmark(depth=[0, 1, 4, 16])
+def scope_depth(depth: int, quick: bool):
+    Schalter.clear()
+    f = Schalter.scoped_configure(make_function(1, with_defaults=False))
+    scope_path = "/".join("s{}".format(i) for i in range(depth))
+    Schalter["{}/a0".format(scope_path) if depth else "/a0"] = 0
+    scopes = [Schalter.Scope("s{}".format(i)) for i in range(depth)]
+    for s in scopes:
+        s.__enter__()
+    try:
+        return best_of(lambda: f(0), 2000 if quick else 50000, 5)
+    finally:
+        for s in reversed(scopes):
+            s.__exit__(None, None, None)
+
+
+@benchmark(depth=[1, 4, 16])
+def scope_enter_exit(depth: int, quick: bool):
+    names = ["s{}".format(i) for i in range(depth)]
+
+    def enter_exit():
+        scopes = [Schalter.Scope(n) for n in names]
+        for s in scopes:
+            s.__enter__()
+        for s in reversed(scopes):
+            s.__exit__(None, None, None)
+
+    return best_of(enter_exit, 1000 if quick else 20000, 5)
+
+
+@benchmark(depth=[1, 4, 16])
+def prefix_chain(depth: int, quick: bool):
+    Schalter.clear()
+    f = Schalter.configure(make_function(4, with_defaults=False))
+    for i in reversed(range(depth)):
+        f = Schalter.prefix("p{}".format(i))(f)
+    prefix = "/".join("p{}".format(i) for i in range(depth))
+    for i in range(4):
+        Schalter["{}/a{}".format(prefix, i)] = i
+    return best_of(lambda: f(0), 2000 if quick else 50000, 5)
+
+
+def make_config_file(folder: pathlib.Path, n_keys: int) -> pathlib.Path:
+    path = folder / "config_{}.yaml".format(n_keys)
+    if not path.exists():
+        Schalter.clear()
+        c = Schalter.get_config()
+        for i in range(n_keys):
+            c.set_manual("group{}/key{}".format(i % 100, i), i)
+        c.write_config_file(path)
+    return path
+
+
+@benchmark(n_keys=[10000, 100000])
+def load_config_from_file(n_keys: int, quick: bool, tmp: pathlib.Path):
+    path = make_config_file(tmp, n_keys)
+
+    def load():
+        Schalter.clear()
+        Schalter.get_config().load_config_from_file(path)
+
+    return best_of(load, 1, 1 if quick else 3)
+
+
+@benchmark(n_keys=[10000, 100000], n_accessed=[100])
+def load_config_lazy(n_keys: int, n_accessed: int, quick: bool, tmp: pathlib.Path):
+    path = make_config_file(tmp, n_keys)
+    keys = [
+        "group{}/key{}".format(i % 100, i)
+        for i in range(0, n_keys, n_keys // n_accessed)
+    ]
+
+    def load():
+        Schalter.clear()
+        Schalter.get_config().load_config_from_file(path, lazy=True)
+        for k in keys:
+            Schalter.get(k)
+
+    return best_of(load, 1, 1 if quick else 3)
+
+
+@benchmark(n_files=[30], parallel=[False, True])
+def load_config_stack(n_files: int, parallel: bool, quick: bool, tmp: pathlib.Path):
+    paths = []
+    for i in range(n_files):
+        path = tmp / "layer_{}.yaml".format(i)
+        if not path.exists():
+            Schalter.clear()
+            c = Schalter.get_config()
+            for k in range(1000):
+                c.set_manual("layer{}/key{}".format(i, k), k)
+            c.write_config_file(path)
+        paths.append(path)
+
+    def load():
+        Schalter.clear()
+        c = Schalter.get_config()
+        if parallel:
+            c.load_config_files(paths)
+        else:
+            for path in paths:
+                c.load_config_from_file(path)
+
+    return best_of(load, 1, 1 if quick else 3)
+
+
+@benchmark(n_keys=[10000, 100000])
+def write_config_file(n_keys: int, quick: bool, tmp: pathlib.Path):
+    Schalter.clear()
+    c = Schalter.get_config()
+    for i in range(n_keys):
+        c.set_manual("group{}/key{}".format(i % 100, i), i)
+    path = tmp / "written.yaml"
+    return best_of(lambda: c.write_config_file(path), 1, 1 if quick else 3)
+
+
+@benchmark(n_keys=[10000, 100000], order=["insertion", "grouped"])
+def stream_config_file(n_keys: int, order: str, quick: bool, tmp: pathlib.Path):
+    Schalter.clear()
+    c = Schalter.get_config()
+    for i in range(n_keys):
+        c.set_manual("group{}/key{}".format(i % 100, i), i)
+    path = tmp / "streamed.yaml"
+    return best_of(lambda: c.stream_config_file(path, order), 1, 1 if quick else 3)
+
+
+def expand(params: dict):
+    combinations = [{}]
+    for k, values in params.items():
+        combinations = [dict(c, **{k: v}) for c in combinations for v in values]
+    return combinations
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=str(pathlib.Path(__file__).parent),
+            check=True,
+        ).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(selected, quick: bool):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for f, params in BENCHMARKS:
+            if selected and f.__name__ not in selected:
+                continue
+            for p in expand(params):
+                kwargs = dict(p, quick=quick)
+                if "tmp" in f.__code__.co_varnames[: f.__code__.co_argcount]:
+                    kwargs["tmp"] = pathlib.Path(tmp)
+                seconds = f(**kwargs)
+                results.append({"name": f.__name__, "params": p, "seconds": seconds})
+                print(
+                    "{:24s} {:40s} {:12.3f} us".format(
+                        f.__name__, json.dumps(p), seconds * 1e6
+                    )
+                )
+    Schalter.clear()
+    return {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "revision": git_revision(),
+            "time": time.time(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(path_before: str, path_after: str):
+    def key(r):
+        return r["name"], json.dumps(r["params"], sort_keys=True)
+
+    with open(path_before) as fb, open(path_after) as fa:
+        before = {key(r): r["seconds"] for r in json.load(fb)["results"]}
+        after = {key(r): r["seconds"] for r in json.load(fa)["results"]}
+    for k in sorted(before.keys() & after.keys()):
+        print("{:24s} {:40s} {:6.2f}x".format(k[0], k[1], after[k] / before[k]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-o", "--output", help="JSON file to write results to")
+    parser.add_argument("-b", "--benchmark", action="append", help="run only these")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two runs"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # keep the output readable: loading reports every file on INFO
+    logging.getLogger("schalter.schalter").setLevel(logging.WARNING)
+    data = run(args.benchmark, args.quick)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tracking of the config keys that are actually read.
+
+Keys are identified by their ids in the global key table. Marking a key as
+accessed sets the flag of its id, so tracking does not allocate on repeated
+accesses and is cheap enough to stay enabled.
+"""
+
+import typing
+
+from .key_table import KEYS
+
+
+class AccessTracker:
+    """ Access flags of config keys, indexed by interned key ids. """
+
+    __slots__ = ("_flags",)
+
+    def __init__(self):
+        # id -> accessed (0/1)
+        self._flags = bytearray()
+
+    def mark_id(self, i: int):
+        flags = self._flags
+        if i >= len(flags):
+            flags.extend(bytes(len(KEYS) - len(flags)))
+        flags[i] = 1
+
+    def mark(self, key):
+        ids = KEYS.ids
+        self.mark_id(ids[key] if key in ids else KEYS.intern(key))
+
+    def mark_all(self, keys: typing.Iterable):
+        for key in keys:
+            self.mark(key)
+
+    def mark_ids(self, ids: typing.Iterable[int]):
+        for i in ids:
+            self.mark_id(i)
+
+    def __contains__(self, key):
+        i = KEYS.ids.get(key)
+        return i is not None and i < len(self._flags) and self._flags[i] == 1
+
+    def accessed(self) -> typing.List:
+        """ All keys marked since the last reset. """
+        keys = KEYS.keys
+        return [keys[i] for i, flag in enumerate(self._flags) if flag]
+
+    def reset(self):
+        """ Clear all flags. """
+        self._flags = bytearray()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Serialization backends for configuration files, chosen by file extension.
+
+Serialization libraries are imported when a backend is first used.
+"""
+
+import os
+import typing
+
+
+class Backend:
+    """ Reads and writes a configuration (a flat mapping) from/to a file. """
+
+    name = None
+    extensions = ()
+
+    def load(self, path) -> dict:
+        raise NotImplementedError()
+
+    def dump(self, data: typing.Mapping, path):
+        raise NotImplementedError()
+
+
+class YamlBackend(Backend):
+    """ YAML 1.2 via ruamel.yaml. Files are parsed with the fastest available
+    loader: ruamel's libyaml based C loader, else PyYAML's libyaml loader with
+    YAML 1.2 core schema resolvers, else the pure Python ruamel loader.
+    """
+
+    name = "yaml"
+    extensions = (".yaml", ".yml")
+
+    def __init__(self):
+        self._loads = None
+
+    def _make_loads(self):
+        from ruamel.yaml import YAML
+
+        if "CParser" not in YAML(typ="safe").Parser.__name__:
+            try:
+                return _pyyaml_loads()
+            except ImportError:
+                pass
+        return _ruamel_loads()
+
+    def loads(self, stream) -> typing.Any:
+        """ Parse a YAML string or stream. """
+        if self._loads is None:
+            self._loads = self._make_loads()
+        return self._loads(stream)
+
+    def load(self, path) -> dict:
+        if hasattr(path, "read"):
+            return self.loads(path)
+        with open(path, "rb") as f:
+            return self.loads(f)
+
+    def dump(self, data: typing.Mapping, path):
+        from ruamel.yaml import YAML
+
+        yaml = YAML()
+        yaml.default_flow_style = False
+        yaml.dump(data if type(data) is dict else dict(data), path)
+
+
+class JsonBackend(Backend):
+    name = "json"
+    extensions = (".json",)
+
+    def load(self, path) -> dict:
+        import json
+
+        if hasattr(path, "read"):
+            return json.load(path)
+        with open(path, "rb") as f:
+            return json.load(f)
+
+    def dump(self, data: typing.Mapping, path):
+        import json
+
+        if hasattr(path, "write"):
+            json.dump(dict(data), path, indent=2)
+            return
+        with open(path, "w") as f:
+            json.dump(dict(data), f, indent=2)
+
+
+class PickleBackend(Backend):
+    """ Binary snapshot of a configuration. Fastest to load, but only load
+    snapshots from trusted sources: unpickling can execute arbitrary code.
+    """
+
+    name = "pickle"
+    extensions = (".pkl", ".pickle")
+
+    def load(self, path) -> dict:
+        import pickle
+
+        if hasattr(path, "read"):
+            return pickle.load(path)
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def dump(self, data: typing.Mapping, path):
+        import pickle
+
+        if hasattr(path, "write"):
+            pickle.dump(dict(data), path, protocol=pickle.HIGHEST_PROTOCOL)
+            return
+        with open(path, "wb") as f:
+            pickle.dump(dict(data), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# extension -> backend. Order of insertion is the lookup order of config names
+# without an extension.
+_backends = {}
+
+
+def register_backend(backend: Backend):
+    for ext in backend.extensions:
+        _backends[ext] = backend
+
+
+def extensions() -> typing.Tuple[str, ...]:
+    return tuple(_backends.keys())
+
+
+def get_backend(path, default: str = None) -> Backend:
+    """ Backend for the extension of `path`.
+
+    :param default: extension to use for streams and unknown extensions.
+    :raises ValueError: if there is no backend for the extension.
+    """
+    ext = os.path.splitext(str(path))[1].lower() if not hasattr(path, "read") else ""
+    try:
+        return _backends[ext]
+    except KeyError:
+        if default is not None:
+            return _backends[default]
+        raise ValueError("No config backend for file '{}'.".format(str(path)))
+
+
+for _backend in (YamlBackend(), JsonBackend(), PickleBackend()):
+    register_backend(_backend)
+
+yaml_backend = _backends[".yaml"]
+
+
+def _ruamel_loads():
+    """ ruamel's safe loader. A `YAML` object is not thread-safe: files are
+    loaded in parallel (see `load_config_files`), so each thread has its own.
+    """
+    import threading
+    from ruamel.yaml import YAML
+
+    local = threading.local()
+
+    def loads(stream):
+        try:
+            yaml = local.yaml
+        except AttributeError:
+            yaml = local.yaml = YAML(typ="safe")
+        return yaml.load(stream)
+
+    return loads
+
+
+def _pyyaml_loads():
+    """ PyYAML's libyaml loader, resolving plain scalars like ruamel's YAML 1.2
+    loader (e.g. 'on' is a string, '1e-3' is a float, '010' is decimal).
+
+    :raises ImportError: if PyYAML is not available with libyaml.
+    """
+    import re
+    import yaml
+
+    if not yaml.__with_libyaml__:
+        raise ImportError("PyYAML was built without libyaml.")
+
+    class Loader(yaml.CSafeLoader):
+        pass
+
+    replaced = {
+        "tag:yaml.org,2002:bool",
+        "tag:yaml.org,2002:int",
+        "tag:yaml.org,2002:float",
+    }
+    Loader.yaml_implicit_resolvers = {
+        k: [r for r in v if r[0] not in replaced]
+        for k, v in yaml.CSafeLoader.yaml_implicit_resolvers.items()
+    }
+    Loader.add_implicit_resolver(
+        "tag:yaml.org,2002:bool",
+        re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"),
+        list("tTfF"),
+    )
+    Loader.add_implicit_resolver(
+        "tag:yaml.org,2002:int",
+        re.compile(r"^[-+]?(?:0b[01_]+|0o[0-7_]+|0x[0-9a-fA-F_]+|[0-9][0-9_]*)$"),
+        list("-+0123456789"),
+    )
+    Loader.add_implicit_resolver(
+        "tag:yaml.org,2002:float",
+        re.compile(
+            r"^(?:[-+]?(?:[0-9][0-9_]*\.[0-9_]*|\.[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)?"
+            r"|[-+]?[0-9][0-9_]*[eE][-+]?[0-9]+"
+            r"|[-+]?\.(?:inf|Inf|INF)|\.(?:nan|NaN|NAN))$"
+        ),
+        list("-+0123456789."),
+    )
+
+    def construct_int(loader, node):
+        value = loader.construct_scalar(node).replace("_", "")
+        digits = value.lstrip("+-")
+        if digits[:2] in ("0b", "0o", "0x"):
+            return int(value, 0)
+        return int(value, 10)
+
+    Loader.add_constructor("tag:yaml.org,2002:int", construct_int)
+
+    def loads(stream):
+        return yaml.load(stream, Loader=Loader)
+
+    return loads
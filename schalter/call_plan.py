@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+import typing
+
+from .key_table import KEYS, ConfigStore
+
+# marker for configured kwonly args without any function default
+NOT_SUPPLIED = object()
+
+
+class CallPlan:
+    """ Immutable, precompiled form of the mapping of a configured function.
+
+    Each entry is (LOCAL_NAME, CONFIG_NAME, is_scoped, function default).
+    The function default is the object that is passed by the wrapper if the
+    caller did not supply the argument.
+    The config keys of a scope path are built and interned once per plan.
+    """
+
+    __slots__ = ("entries", "by_name", "has_scoped", "names", "_scopes")
+
+    def __init__(
+        self,
+        mapping: {str: (str, typing.Any, bool)},
+        kwdefaults: typing.Optional[dict] = None,
+    ):
+        if kwdefaults is None:
+            kwdefaults = {}
+        self.entries = tuple(
+            (k, v[0], bool(v[2]), kwdefaults.get(k, NOT_SUPPLIED))
+            for k, v in mapping.items()
+        )
+        self.by_name = {e[0]: e[1:] for e in self.entries}
+        self.has_scoped = any(e[2] for e in self.entries)
+        self.names = tuple(e[0] for e in self.entries)
+        # scope path -> (config keys, key ids)
+        self._scopes = {}
+
+    def _scope_keys(self, scope: str) -> typing.Tuple[tuple, tuple]:
+        try:
+            return self._scopes[scope]
+        except KeyError:
+            pass
+        prefix = scope + "/"
+        keys = tuple(
+            prefix + config_name if is_scoped else config_name
+            for _, config_name, is_scoped, _ in self.entries
+        )
+        ids = KEYS.intern_all(keys)
+        keys = tuple(KEYS.keys[i] for i in ids)
+        return self._scopes.setdefault(scope, (keys, ids))
+
+    def resolve(
+        self,
+        config: typing.Mapping,
+        scope: str = "",
+        fallback: typing.Callable[[typing.Mapping, str, str], typing.Any] = None,
+    ) -> dict:
+        """ Look up all configured values in `config` for the given scope path.
+
+        :param fallback: looks up scoped entries as fallback(config, scope, key).
+        :raises KeyError: if a config entry is missing.
+        """
+        if fallback is not None and self.has_scoped:
+            return {
+                local_name: fallback(config, scope, config_name)
+                if is_scoped
+                else config[config_name]
+                for local_name, config_name, is_scoped, _ in self.entries
+            }
+        keys, ids = self._scope_keys(scope if self.has_scoped else "")
+        if isinstance(config, ConfigStore):
+            return dict(zip(self.names, config.lookup_ids(ids)))
+        return dict(zip(self.names, [config[k] for k in keys]))
+
+    def keys(self, scope: str = "") -> typing.Tuple[str, ...]:
+        """ The config keys that `resolve` looks up for the given scope path
+        (without fallback).
+        """
+        return self._scope_keys(scope if self.has_scoped else "")[0]
+
+    def key_ids(self, scope: str = "") -> typing.Tuple[int, ...]:
+        """ Ids of `keys(scope)` in the global key table. """
+        return self._scope_keys(scope if self.has_scoped else "")[1]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of parsed configuration files.
+
+Every config file gets one cache entry: a pickled header (format version, size,
+mtime and SHA-256 digest of the file) followed by the pickled config data.
+An entry is only used if size, mtime and content digest all match the file.
+Entries are written to a temporary file and atomically moved into place, so
+several processes can populate the same cache concurrently.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import typing
+
+CACHE_FORMAT_VERSION = 1
+
+# cache lookup result if there is no valid entry
+MISS = object()
+
+
+def entry_path(config_file, cache_dir) -> str:
+    key = hashlib.sha1(os.path.abspath(str(config_file)).encode()).hexdigest()
+    return os.path.join(str(cache_dir), key + ".pkl")
+
+
+def _read_entry(path: str, header: tuple):
+    try:
+        with open(path, "rb") as f:
+            if pickle.load(f) != header:
+                return MISS
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return MISS
+
+
+def lookup(config_file, cache_dir) -> typing.Tuple[bytes, tuple, typing.Any]:
+    """ Read a config file and look up its parsed data in the cache.
+
+    :return: (file content, cache header, config data or MISS)
+    """
+    with open(str(config_file), "rb") as f:
+        stat = os.fstat(f.fileno())
+        raw = f.read()
+    header = (
+        CACHE_FORMAT_VERSION,
+        stat.st_size,
+        stat.st_mtime_ns,
+        hashlib.sha256(raw).hexdigest(),
+    )
+    return raw, header, _read_entry(entry_path(config_file, cache_dir), header)
+
+
+def store(config_file, cache_dir, header: tuple, data):
+    """ Atomically write the cache entry for a config file.
+
+    :param header: as returned by `lookup` for the content that `data` was
+    parsed from.
+    :raises OSError: if the entry cannot be written.
+    """
+    path = entry_path(config_file, cache_dir)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
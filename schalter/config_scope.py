@@ -4,18 +4,59 @@
 
 """
 
+import sys
+import typing
+from contextvars import ContextVar, Token
+
+
+class ScopePath:
+    """ Immutable scope path. Paths are interned: entering the same child scope
+    twice yields the identical object.
+    """
+
+    __slots__ = ("parts", "fullname", "_children")
+
+    def __init__(self, parts: typing.Tuple[str, ...]):
+        self.parts = parts
+        self.fullname = sys.intern("/".join(parts))
+        self._children = {}
+
+    def child(self, name: str) -> "ScopePath":
+        try:
+            return self._children[name]
+        except KeyError:
+            # setdefault: concurrent creators agree on one instance
+            return self._children.setdefault(name, ScopePath(self.parts + (name,)))
+
+    def __repr__(self):
+        return "ScopePath('{}')".format(self.fullname)
+
+
+ROOT_SCOPE = ScopePath(())
+
 
 class ConfigScope:
+    """ Current scope path, tracked separately per thread and asyncio task. """
+
     def __init__(self):
-        self.parts = []
+        self._path = ContextVar(
+            "schalter_scope_{}".format(id(self)), default=ROOT_SCOPE
+        )
+
+    @property
+    def path(self) -> ScopePath:
+        return self._path.get()
+
+    @property
+    def parts(self) -> typing.Tuple[str, ...]:
+        return self._path.get().parts
 
     @property
-    def fullname(self):
-        return "/".join(self.parts)
+    def fullname(self) -> str:
+        return self._path.get().fullname
 
-    def make_scope(self, name: str):
-        self.parts.append(name)
-        return self
+    def make_scope(self, name: str) -> Token:
+        return self._path.set(self._path.get().child(name))
 
-    def release_scope(self):
-        self.parts.pop()
+    def release_scope(self, token: Token):
+        self._path.reset(token)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Read-only configuration store in a memory-mapped file.
+
+A parent process freezes its configuration into a file once. Worker processes
+attach to it: the file is mapped, not read, so all workers share the same
+physical pages. Values are unpickled on first access only.
+
+File layout (native byte order, all offsets uint64):
+    MAGIC | n | key offsets (n + 1) | value offsets (n + 1) | keys | values
+Keys are UTF-8 encoded and sorted bytewise, values are pickled.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import typing
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b"SCHFRZ1" + (b"L" if sys.byteorder == "little" else b"B")
+_HEADER = struct.Struct("=8sQ")
+
+
+def freeze(config: typing.Mapping, path):
+    """ Write `config` to a frozen store file. The file is replaced atomically. """
+    items = sorted((str(k).encode("utf-8"), v) for k, v in config.items())
+    values = [pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL) for _, v in items]
+
+    key_offsets = array("Q", [0])
+    for k, _ in items:
+        key_offsets.append(key_offsets[-1] + len(k))
+    value_offsets = array("Q", [0])
+    for v in values:
+        value_offsets.append(value_offsets[-1] + len(v))
+
+    path = str(path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(items)))
+            f.write(key_offsets.tobytes())
+            f.write(value_offsets.tobytes())
+            for k, _ in items:
+                f.write(k)
+            for v in values:
+                f.write(v)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class FrozenConfigStore(Mapping):
+    """ Read-only mapping on top of a frozen store file. Lookups are binary
+    searches over the mapped keys.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError("Not a frozen config store: '{}'.".format(self.path))
+
+        self._n = n
+        view = memoryview(self._mm)
+        start = _HEADER.size
+        self._key_offsets = view[start : start + 8 * (n + 1)].cast("Q")
+        start += 8 * (n + 1)
+        self._value_offsets = view[start : start + 8 * (n + 1)].cast("Q")
+        self._keys_start = start + 8 * (n + 1)
+        self._values_start = self._keys_start + self._key_offsets[n]
+        # unpickled values of the keys this process used
+        self._values = {}
+
+    def __reduce__(self):
+        # processes attach to the file instead of receiving a copy
+        return type(self), (self.path,)
+
+    def _key(self, i: int) -> bytes:
+        o = self._key_offsets
+        return self._mm[self._keys_start + o[i] : self._keys_start + o[i + 1]]
+
+    def _find(self, key: str) -> int:
+        if not isinstance(key, str):
+            return -1
+        k = key.encode("utf-8")
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < k:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self._key(lo) == k:
+            return lo
+        return -1
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        o = self._value_offsets
+        start = self._values_start
+        value = pickle.loads(self._mm[start + o[i] : start + o[i + 1]])
+        self._values[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._values or self._find(key) >= 0
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._key(i).decode("utf-8")
+
+    def __repr__(self):
+        return "FrozenConfigStore('{}', {} keys)".format(self.path, self._n)
+
+
+class LayeredConfig(dict):
+    """ Writable configuration on top of a read-only base mapping. The dict
+    itself holds all values written after the base was attached, `deleted`
+    the keys of the base that were deleted since.
+    """
+
+    def __init__(
+        self,
+        base: typing.Mapping,
+        overlay: typing.Mapping = (),
+        deleted: typing.Iterable = (),
+    ):
+        super().__init__(overlay)
+        self.base = base
+        self.deleted = set(deleted)
+
+    def __missing__(self, key):
+        if key in self.deleted:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or (
+            key in self.base and key not in self.deleted
+        )
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.deleted.discard(key)
+
+    def update(self, other):
+        dict.update(self, other)
+        if self.deleted:
+            self.deleted.difference_update(other.keys())
+
+    def discard(self, key):
+        """ Delete a key if it exists. """
+        dict.pop(self, key, None)
+        if key in self.base:
+            self.deleted.add(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return dict.keys(self) | (self.base.keys() - self.deleted)
+
+    def __iter__(self):
+        yield from dict.__iter__(self)
+        for k in self.base:
+            if not dict.__contains__(self, k) and k not in self.deleted:
+                yield k
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def copy(self):
+        return LayeredConfig(self.base, dict(dict.items(self)), self.deleted)
+
+    def __reduce__(self):
+        # the base store is pickled as its path
+        return LayeredConfig, (self.base, dict(dict.items(self)), self.deleted)
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    def __repr__(self):
+        return "LayeredConfig({!r}, {})".format(self.base, dict.__repr__(self))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of configured function calls.
+
+Hooks are only installed into the configured functions while instrumentation is
+enabled. Without hooks, calls take the uninstrumented path.
+"""
+
+import threading
+import typing
+from collections import Counter
+
+
+class CallHook:
+    """ Base class of instrumentation hooks (see `Schalter.add_hook`). """
+
+    def on_call(
+        self,
+        function: typing.Callable,
+        scope: str,
+        keys: typing.Tuple[str, ...],
+        missed: bool,
+        resolve_seconds: float,
+        call_seconds: float,
+    ):
+        """ Called after every call of a configured function.
+
+        :param function: the configured function (wrapper).
+        :param scope: scope path of the call ('' if the function is not scoped).
+        :param keys: config keys of the configured arguments.
+        :param missed: True if the arguments were not in the resolution cache.
+        :param resolve_seconds: time spent before calling the wrapped function.
+        :param call_seconds: time spent in the wrapped function.
+        """
+
+
+def function_name(function: typing.Callable) -> str:
+    return "{}.{}".format(function.__module__, function.__qualname__)
+
+
+class CallStats(CallHook):
+    """ Collects per-function call counters and timings, per-key hit counts and
+    the number of calls per scope path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # name -> [calls, cache misses, resolve seconds, call seconds]
+            self._functions = {}
+            self._keys = Counter()
+            self._scopes = Counter()
+
+    def on_call(self, function, scope, keys, missed, resolve_seconds, call_seconds):
+        name = function_name(function)
+        with self._lock:
+            try:
+                counters = self._functions[name]
+            except KeyError:
+                counters = self._functions[name] = [0, 0, 0.0, 0.0]
+            counters[0] += 1
+            counters[1] += missed
+            counters[2] += resolve_seconds
+            counters[3] += call_seconds
+            self._keys.update(keys)
+            self._scopes[scope] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "functions": {
+                    name: {
+                        "calls": c[0],
+                        "misses": c[1],
+                        "resolve_seconds": c[2],
+                        "call_seconds": c[3],
+                    }
+                    for name, c in self._functions.items()
+                },
+                "keys": dict(self._keys),
+                "scopes": dict(self._scopes),
+            }
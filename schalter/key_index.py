@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+"""
+
+import typing
+
+SEPARATOR = "/"
+
+
+class _Node:
+    __slots__ = ("children", "is_key")
+
+    def __init__(self):
+        self.children = {}
+        self.is_key = False
+
+
+class KeyTrie:
+    """ Index of slash-separated config keys by their path components.
+
+    Finding the subtree below a prefix costs O(depth), independent of the
+    total number of keys.
+    """
+
+    def __init__(self, keys: typing.Iterable[str] = ()):
+        self._root = _Node()
+        self._len = 0
+        for k in keys:
+            self.add(k)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, key):
+        if not isinstance(key, str):
+            return False
+        node = self._node(key)
+        return node is not None and node.is_key
+
+    def add(self, key: str):
+        if not isinstance(key, str):
+            # only string keys are hierarchical
+            return
+        node = self._root
+        for part in key.split(SEPARATOR):
+            try:
+                node = node.children[part]
+            except KeyError:
+                node.children[part] = node = _Node()
+        if not node.is_key:
+            node.is_key = True
+            self._len += 1
+
+    def remove(self, key: str):
+        """ Remove a key, pruning nodes that have become empty.
+
+        :raises KeyError: if the key is not indexed.
+        """
+        if not isinstance(key, str):
+            raise KeyError(key)
+        path = [self._root]
+        parts = key.split(SEPARATOR)
+        for part in parts:
+            try:
+                path.append(path[-1].children[part])
+            except KeyError:
+                raise KeyError(key)
+        if not path[-1].is_key:
+            raise KeyError(key)
+        path[-1].is_key = False
+        self._len -= 1
+        for parent, part, node in zip(
+            reversed(path[:-1]), reversed(parts), reversed(path)
+        ):
+            if node.is_key or node.children:
+                break
+            del parent.children[part]
+
+    def _node(self, prefix: str) -> typing.Optional[_Node]:
+        node = self._root
+        if not prefix:
+            return node
+        for part in prefix.split(SEPARATOR):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def subtree(self, prefix: str) -> typing.Iterator[str]:
+        """ All keys equal to `prefix` or below it (`prefix/...`).
+        An empty prefix yields all keys.
+        """
+        node = self._node(prefix)
+        if node is None:
+            return
+        # the root node has no key (None)
+        stack = [(node, prefix if prefix else None)]
+        while stack:
+            node, key = stack.pop()
+            if node.is_key:
+                yield key
+            for part, child in node.children.items():
+                stack.append((child, part if key is None else key + SEPARATOR + part))
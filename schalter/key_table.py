@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Interned config keys with compact integer ids.
+
+Keys are interned once in an append-only table that is shared by all
+configurations. A `ConfigStore` keeps its values in a list indexed by these ids:
+copies of a store only copy the list, and lookups by id need no hashing.
+
+The table is never shrunk (ids stay valid for all configured functions), but
+only keys that are written to a store or read by configured functions are
+interned. A store's list spans the ids of its own keys only, from the smallest
+to the largest: keys of a config that are loaded together are adjacent.
+"""
+
+import sys
+import threading
+import typing
+from collections.abc import MutableMapping
+
+
+class KeyTable:
+    """ Append-only table of interned keys. Ids are never reused. """
+
+    __slots__ = ("ids", "keys", "_lock")
+
+    def __init__(self):
+        # key -> id, id -> key
+        self.ids = {}
+        self.keys = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def intern(self, key) -> int:
+        try:
+            return self.ids[key]
+        except KeyError:
+            pass
+        if isinstance(key, str):
+            key = sys.intern(key)
+        with self._lock:
+            i = self.ids.get(key)
+            if i is None:
+                i = len(self.keys)
+                self.keys.append(key)
+                self.ids[key] = i
+        return i
+
+    def intern_all(self, keys: typing.Iterable) -> typing.Tuple[int, ...]:
+        ids = self.ids
+        return tuple(ids[k] if k in ids else self.intern(k) for k in keys)
+
+
+# the table of all configurations
+KEYS = KeyTable()
+
+# marks ids without a value in a store
+_EMPTY = object()
+
+
+class ConfigStore(MutableMapping):
+    """ Configuration values in a list indexed by the ids of the global
+    `KeyTable`, offset by the smallest id of the store's keys.
+    """
+
+    __slots__ = ("_values", "_base", "_len")
+
+    def __init__(self, data: typing.Mapping = ()):
+        # values[i - base] is the value of the key with id i
+        self._values = []
+        self._base = 0
+        self._len = 0
+        if data:
+            self.update(data)
+
+    def __getitem__(self, key):
+        i = KEYS.ids.get(key)
+        if i is not None:
+            i -= self._base
+            if 0 <= i < len(self._values):
+                value = self._values[i]
+                if value is not _EMPTY:
+                    return value
+        raise KeyError(key)
+
+    def lookup_ids(self, ids: typing.Iterable[int]) -> list:
+        """ Values of the keys with the given ids.
+
+        :raises KeyError: if a key has no value.
+        """
+        values = self._values
+        base = self._base
+        n = len(values)
+        result = []
+        for i in ids:
+            j = i - base
+            value = values[j] if 0 <= j < n else _EMPTY
+            if value is _EMPTY:
+                raise KeyError(KEYS.keys[i])
+            result.append(value)
+        return result
+
+    def __contains__(self, key):
+        i = KEYS.ids.get(key)
+        if i is None:
+            return False
+        i -= self._base
+        return 0 <= i < len(self._values) and self._values[i] is not _EMPTY
+
+    def __setitem__(self, key, value):
+        self.update(((key, value),))
+
+    def update(self, other=(), **kw):
+        if isinstance(other, typing.Mapping):
+            other = other.items()
+        ids = KEYS.ids
+        intern = KEYS.intern
+        added = 0
+        for key, value in other:
+            i = ids[key] if key in ids else intern(key)
+            values = self._values
+            j = i - self._base
+            if j < 0 or not values:
+                # grow to the front (or start at the first key)
+                values[:0] = [_EMPTY] * (-j if values else 0)
+                self._base = i
+                j = 0
+            if j >= len(values):
+                values.extend([_EMPTY] * (j + 1 - len(values)))
+            if values[j] is _EMPTY:
+                added += 1
+            values[j] = value
+        self._len += added
+        if kw:
+            self.update(kw)
+
+    def __delitem__(self, key):
+        i = KEYS.ids.get(key)
+        j = -1 if i is None else i - self._base
+        if not 0 <= j < len(self._values) or self._values[j] is _EMPTY:
+            raise KeyError(key)
+        self._values[j] = _EMPTY
+        self._len -= 1
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        keys = KEYS.keys
+        base = self._base
+        for j, value in enumerate(self._values):
+            if value is not _EMPTY:
+                yield keys[base + j]
+
+    def __reduce__(self):
+        # key ids are only valid in this process
+        return ConfigStore, (dict(self.items()),)
+
+    def copy(self) -> "ConfigStore":
+        store = ConfigStore()
+        store._values = self._values.copy()
+        store._base = self._base
+        store._len = self._len
+        return store
+
+    def __repr__(self):
+        return "ConfigStore({})".format(dict(self.items()))
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lazily parsed YAML config files.
+
+A config file is a top-level block mapping. The file is read once into a private
+buffer (files may be rewritten in place while they are attached). One pass over
+the buffer finds the line of every top-level key; each entry extends to the next
+top-level line. Values are parsed from their entry's text on first access only.
+
+Files that cannot be split into independent entries (anchors and aliases,
+several documents, complex keys, a top-level flow mapping, flow collections or
+quoted scalars that continue at column 0) are not indexed.
+"""
+
+import json
+import re
+import typing
+from collections.abc import Mapping
+
+from . import backends
+
+# lines that start at column 0 and are neither blank nor comments. Group 1 is
+# the key of the common `plain key: ...` lines, group 2 a sequence item (part of
+# the value of the previous key). Other lines are parsed separately.
+_TOP_LEVEL = re.compile(
+    rb"^(?:([^\s\-?:,\[\]{}#&*!|>'\"%@`](?:[^:\r\n]|:(?![ \t\r\n]))*?)"
+    rb"[ \t]*:(?=[ \t\r\n]|\Z)|(-(?=[ \t\r\n]|\Z))|[^ \t\r\n#])",
+    re.M,
+)
+# anchors and aliases may connect entries (false positives only disable laziness)
+_ANCHOR = re.compile(rb"(?:^|[\s\[{,])[&*][^\s\]},]")
+# plain scalars that are not strings in YAML 1.2 (or 1.1 booleans)
+_NOT_A_STRING = re.compile(
+    r"^(?:~|null|Null|NULL|true|True|TRUE|false|False|FALSE"
+    r"|y|Y|yes|Yes|YES|n|N|no|No|NO|on|On|ON|off|Off|OFF"
+    r"|[-+]?[0-9._]+(?:[eE][-+]?[0-9]+)?|[-+]?0[box][0-9a-fA-F_]+"
+    r"|[-+]?\.(?:inf|Inf|INF)|\.(?:nan|NaN|NAN))$"
+)
+_NOT_A_STRING_FIRST = frozenset("~nNtTfFyYoO0123456789+-._")
+# tokens that can continue a value across lines: the start of a line at column
+# 0, flow brackets, quoted scalars (or an unterminated quote) and comments. Each
+# alternative starts with its character, so that other bytes are skipped fast.
+_FLOW = re.compile(
+    rb"\n(?=[^\s#])|[\[\]{}]"
+    rb"|\"(?<=[\s\[{,:]\")(?:[^\"\\]|\\.)*\"|'(?<=[\s\[{,:]')(?:[^']|'')*'"
+    rb"|[\"'](?<=[\s\[{,:][\"'])|#(?<=\s#)[^\r\n]*",
+    re.S,
+)
+_FLOW_START = re.compile(rb"[\[{\"']")
+_COLUMN_0 = re.compile(rb"\n[^\s#]")
+_BOM = b"\xef\xbb\xbf"
+
+
+def _parse_key(line: bytes):
+    """ Key of a top-level entry line, or None if it is not supported. """
+    if line[:1] in (b'"', b"'"):
+        quote = line[:1]
+        i = 1
+        while True:
+            i = line.find(quote, i)
+            if i < 0:
+                return None
+            if quote == b'"' and _escaped(line, i):
+                i += 1
+            elif quote == b"'" and line[i + 1 : i + 2] == b"'":
+                i += 2
+            else:
+                break
+        token, rest = line[: i + 1], line[i + 1 :].lstrip(b" ")
+        if not rest.startswith(b":"):
+            return None
+        if quote == b"'":
+            return token[1:-1].replace(b"''", b"'").decode("utf-8")
+        try:
+            return json.loads(token.decode("utf-8"))
+        except ValueError:
+            # YAML-only escape sequences
+            return _yaml_key(token)
+
+    # not a plain key (see _TOP_LEVEL): indicators, `---` or no key
+    return None
+
+
+def _plain_key(token: bytes):
+    key = token.decode("utf-8")
+    if (
+        (key[0] in _NOT_A_STRING_FIRST and _NOT_A_STRING.match(key))
+        or b" #" in token
+        or b"\t#" in token
+    ):
+        return _yaml_key(token)
+    return key
+
+
+def _escaped(line: bytes, i: int) -> bool:
+    n = 0
+    while i - n - 1 >= 0 and line[i - n - 1] == ord("\\"):
+        n += 1
+    return n % 2 == 1
+
+
+def _yaml_key(token: bytes):
+    return next(iter(backends.yaml_backend.loads(token + b": null").keys()))
+
+
+def _self_contained(buf) -> bool:
+    """ No flow collection or quoted scalar continues at column 0 (false
+    negatives only disable laziness, e.g. brackets in block scalars).
+    """
+    if not _FLOW_START.search(buf):
+        return True
+    depth = 0
+    for t in _FLOW.findall(buf):
+        c = t[:1]
+        if c == b"\n":
+            if depth:
+                return False
+        elif c == b"{" or c == b"[":
+            depth += 1
+        elif c == b"}" or c == b"]":
+            depth -= 1
+            if depth < 0:
+                return False
+        elif c == b'"' or c == b"'":
+            if len(t) == 1 or (b"\n" in t and _COLUMN_0.search(t)):
+                # unterminated or continued at column 0
+                return False
+    return depth == 0
+
+
+def index_yaml(
+    buf,
+) -> typing.Optional[typing.Dict[typing.Any, typing.Tuple[int, int]]]:
+    """ Index the top-level entries of a YAML mapping.
+
+    :return: {key: (start, end) of the entry} or None if the document cannot be
+    split into entries.
+    """
+    if (buf.find(b"&") >= 0 or buf.find(b"*") >= 0) and _ANCHOR.search(buf):
+        return None
+    # offsets stay relative to `buf`, the entries exclude a byte order mark
+    skip = len(_BOM) if buf[: len(_BOM)] == _BOM else 0
+    if skip:
+        buf = buf[skip:]
+    entries = []
+    first = True
+    for m in _TOP_LEVEL.finditer(buf):
+        start = m.start()
+        if first and buf[start : start + 3] == b"---":
+            # document start marker, once, without content on its line
+            line_end = buf.find(b"\n", start)
+            rest = buf[start + 3 : line_end if line_end >= 0 else len(buf)].strip()
+            if rest and not rest.startswith(b"#"):
+                return None
+        elif m.group(2) is None:
+            entries.append((start, m.group(1)))
+        elif not entries:
+            # a top-level sequence
+            return None
+        first = False
+    index = {}
+    ends = [start for start, _ in entries[1:]]
+    ends.append(len(buf))
+    if not _self_contained(buf):
+        return None
+    for (start, token), end in zip(entries, ends):
+        if token is not None:
+            key = _plain_key(token)
+        else:
+            line_end = buf.find(b"\n", start, end)
+            key = _parse_key(buf[start : line_end if line_end >= 0 else end])
+            if key is None:
+                return None
+        index[key] = (start + skip, end + skip)
+    return index
+
+
+class LazyYamlFile(Mapping):
+    """ Read-only mapping of the top-level entries of a YAML file. Values are
+    parsed on first access and kept.
+    """
+
+    def __init__(self, path, index=None, buf: bytes = None):
+        self.path = str(path)
+        if buf is None:
+            with open(self.path, "rb") as f:
+                buf = f.read()
+        self._buf = buf
+        self._index = index if index is not None else index_yaml(buf)
+        if self._index is None:
+            raise ValueError("Cannot index config file '{}'.".format(self.path))
+        self._values = {}
+
+    @classmethod
+    def open(cls, path) -> typing.Optional["LazyYamlFile"]:
+        """ :return: the lazy file, or None if it cannot be indexed. """
+        with open(str(path), "rb") as f:
+            buf = f.read()
+        index = index_yaml(buf)
+        if index is None:
+            return None
+        return cls(path, index, buf)
+
+    def __reduce__(self):
+        # the loaded content (the file may have changed since), indexed again
+        return type(self), (self.path, None, self._buf)
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        start, end = self._index[key]
+        entry = backends.yaml_backend.loads(self._buf[start:end])
+        (value,) = entry.values()
+        self._values[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __repr__(self):
+        return "LazyYamlFile('{}', {} keys, {} parsed)".format(
+            self.path, len(self._index), len(self._values)
+        )
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Propagation of configurations to worker processes.
+
+With the 'spawn' (or 'forkserver') start method, workers start with empty
+module globals. The parent exports its configurations and the active scope
+into one pickled blob; the pool initializer installs it in every worker.
+Configurations on a frozen store are shipped as the store path: workers map
+the store file instead of unpickling the values. Configurations in shared memory
+are shipped as the name of the segment: workers attach to it.
+"""
+
+import pickle
+import typing
+
+from .provenance import IMPORTED
+
+STATE_FORMAT_VERSION = 1
+
+
+def export_state(names: typing.Iterable[str] = None) -> bytes:
+    """ Pickle configurations (all if `names` is None) and the active scope. """
+    from .schalter import Schalter
+
+    if names is None:
+        names = list(Schalter._configurations.keys())
+    configurations = {}
+    for name in names:
+        c = Schalter.get_config(name)
+        configurations[name] = {
+            # a shared store holds all values
+            "config": c._config if c._shared is None else {},
+            "shared": c._shared,
+            "defaults": dict(c.default_values._x),
+            "copy_on_write": c._copy_on_write,
+            "scope_fallback": c._scope_fallback,
+        }
+    state = (STATE_FORMAT_VERSION, configurations, Schalter._scope.parts)
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def import_state(blob: bytes):
+    """ Fill the configurations of this process with exported ones and enter
+    the exported scope. Existing configurations are updated in place: functions
+    that were configured before (e.g. on import of `__main__` in a spawned
+    worker) see the imported values.
+
+    :raises ValueError: if the blob was written by an incompatible version.
+    """
+    from .frozen_store import LayeredConfig
+    from .key_table import ConfigStore
+    from .schalter import Schalter
+
+    version, configurations, scope_parts = pickle.loads(blob)
+    if version != STATE_FORMAT_VERSION:
+        raise ValueError("Unsupported config state version {}.".format(version))
+
+    for name, state in configurations.items():
+        c = Schalter.get_config(name)
+        c.set_copy_on_write(state["copy_on_write"])
+        c.set_scope_fallback(state["scope_fallback"])
+        for k, v in state["defaults"].items():
+            c.default_values[k] = v
+        config = state["config"]
+        if isinstance(config, ConfigStore):
+            c.set_compact_store()
+        with c.transaction():
+            stale = [k for k in c._config.keys() if k not in config]
+            if stale:
+                c._delete(stale, publish=False)
+            if isinstance(config, LayeredConfig):
+                # keep the store as base instead of reading all of its values
+                c._install(config)
+            elif config:
+                c._write(dict(config.items()), publish=False, source=IMPORTED)
+        if state["shared"] is not None:
+            c.attach_shared_config(state["shared"])
+
+    # leave the scope of a previously imported state, enter the exported scope
+    scope = Schalter._scope
+    while _worker_scope_tokens:
+        scope.release_scope(_worker_scope_tokens.pop())
+    for part in scope_parts:
+        _worker_scope_tokens.append(scope.make_scope(part))
+
+
+_worker_scope_tokens = []
+
+
+def initialize_worker(blob: bytes):
+    """ Initializer of pool workers, see `pool_kwargs`. """
+    import_state(blob)
+
+
+def pool_kwargs(names: typing.Iterable[str] = None) -> dict:
+    """ Keyword arguments for `concurrent.futures.ProcessPoolExecutor` and
+    `multiprocessing.Pool` that start all workers with the current
+    configurations and scope:
+
+        ProcessPoolExecutor(max_workers=4, **Schalter.pool_kwargs())
+    """
+    return {"initializer": initialize_worker, "initargs": (export_state(names),)}
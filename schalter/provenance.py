@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Provenance of configuration values.
+
+Every written key records the id of its source: a config file, a config string
+or a kind of write ('<manual>', '<default>', ...). A source is registered once
+and keeps its id when it is loaded again, so memory is bounded by the number of
+keys and sources, no matter how often files are reloaded. Parsed data is not
+kept: the lines of the keys of a file are indexed when an origin is first
+queried, and only used while the file is unchanged.
+"""
+
+import os
+import typing
+
+MANUAL = "<manual>"
+DEFAULT = "<default>"
+STRING = "<str>"
+SHARED = "<shared>"
+# received from the parent process (see `process_pool`)
+IMPORTED = "<imported>"
+
+
+class Origin(typing.NamedTuple):
+    """ Source of a value: a file path or '<...>' and the line of the key in
+    the file (None if unknown or the file changed since it was loaded).
+    """
+
+    source: str
+    line: typing.Optional[int] = None
+
+
+class _Source:
+    __slots__ = ("name", "path", "signature", "lazy", "lines")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.path = None
+        self.signature = None
+        # a lazily loaded file (see `LazyYamlFile`) keeps the loaded content
+        # and the offsets of its entries
+        self.lazy = None
+        # key -> line, built on the first line lookup
+        self.lines = None
+
+
+def _signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _lines(buf: bytes, offsets: typing.Iterable[typing.Tuple[typing.Any, int]]):
+    # {key: line} of keys at ascending offsets of `buf`
+    lines = {}
+    line, pos = 1, 0
+    for key, offset in offsets:
+        line += buf.count(b"\n", pos, offset)
+        pos = offset
+        lines.setdefault(key, line)
+    return lines
+
+
+def _line_index(raw: bytes, path: str) -> dict:
+    # lines of the top-level keys in the text of a YAML or JSON config file
+    from . import backends
+
+    try:
+        backend = backends.get_backend(path)
+    except ValueError:
+        # no text backend (e.g. frozen stores)
+        return {}
+    if isinstance(backend, backends.JsonBackend):
+        import json
+        import re
+
+        found = []
+        for m in re.finditer(rb'"(?:[^"\\]|\\.)*"\s*:', raw):
+            try:
+                key = json.loads(m.group().rstrip(b": \t\r\n"))
+            except ValueError:
+                continue
+            found.append((key, m.start()))
+        return _lines(raw, found)
+    if not isinstance(backend, backends.YamlBackend):
+        return {}
+    from .lazy_yaml import index_yaml
+
+    index = index_yaml(raw)
+    if index is None:
+        return {}
+    return _lines(raw, sorted(((k, v[0]) for k, v in index.items()), key=_offset))
+
+
+def _offset(item):
+    return item[1]
+
+
+class ProvenanceStore:
+    """ Origin of every key and, with `history_depth` > 1, the sources of its
+    previous values (most recent first).
+
+    Read-only bases (frozen stores, lazily loaded files) are recorded as a
+    whole: their keys are looked up when an origin is queried.
+    """
+
+    def __init__(self, history_depth: int = 1):
+        if history_depth < 1:
+            raise ValueError("History depth must be at least 1.")
+        self.history_depth = history_depth
+        self._sources = []
+        self._source_ids = {}
+        # key -> source id, key -> ids of previous sources
+        self._origins = {}
+        self._history = {}
+        # [(source id, mapping)] of the bases, most recent last
+        self._bases = []
+
+    def source_id(self, source, lazy=None) -> int:
+        """ Register a source (once per name) and return its id. Files are
+        registered with their modification time to validate line lookups.
+
+        :param lazy: the `LazyYamlFile` if the source was loaded lazily.
+        """
+        if type(source) is str and source.startswith("<"):
+            # not a file: nothing to update
+            i = self._source_ids.get(source)
+            if i is not None:
+                return i
+        if hasattr(source, "read"):
+            name = str(getattr(source, "name", "<stream>"))
+            path = None
+        else:
+            name = str(source)
+            path = None if name.startswith("<") else name
+
+        i = self._source_ids.get(name)
+        if i is None:
+            i = len(self._sources)
+            self._sources.append(_Source(name))
+            self._source_ids[name] = i
+        s = self._sources[i]
+        if path is not None:
+            s.path = path
+            s.signature = _signature(path)
+        s.lazy = lazy
+        s.lines = None
+        return i
+
+    def record(self, source, keys: typing.Iterable):
+        """ `source` wrote the values of `keys`. """
+        i = self.source_id(source)
+        if self.history_depth == 1:
+            self._origins.update(dict.fromkeys(keys, i))
+            return
+        origins, history = self._origins, self._history
+        n = self.history_depth - 1
+        for k in keys:
+            previous = origins.get(k)
+            if previous is None:
+                previous = self._base_source(k)
+            if previous is not None:
+                history[k] = ((previous,) + history.get(k, ()))[:n]
+            origins[k] = i
+
+    def record_base(self, source, mapping: typing.Mapping, lazy=None):
+        """ All keys of `mapping` come from `source`, which is the new base of
+        the configuration. Keys written before are overridden.
+        """
+        i = self.source_id(source, lazy)
+        origins, history = self._origins, self._history
+        n = self.history_depth - 1
+        # only the keys written before are checked, not the base
+        for k in [k for k in origins if k in mapping]:
+            previous = origins.pop(k)
+            if n:
+                history[k] = ((previous,) + history.get(k, ()))[:n]
+        self._bases = [b for b in self._bases if b[0] != i]
+        self._bases.append((i, mapping))
+
+    def _base_source(self, key) -> typing.Optional[int]:
+        for i, mapping in reversed(self._bases):
+            if key in mapping:
+                return i
+        return None
+
+    def forget(self, keys: typing.Iterable):
+        """ Keys were deleted. """
+        for k in keys:
+            self._origins.pop(k, None)
+            self._history.pop(k, None)
+
+    def set_history_depth(self, depth: int):
+        if depth < 1:
+            raise ValueError("History depth must be at least 1.")
+        self.history_depth = depth
+        if depth == 1:
+            self._history = {}
+        else:
+            self._history = {k: h[: depth - 1] for k, h in self._history.items()}
+
+    def origin(self, key) -> typing.Optional[Origin]:
+        """ :return: origin of the current value, None if not recorded. """
+        i = self._origins.get(key)
+        if i is None:
+            i = self._base_source(key)
+        return None if i is None else self._resolve(i, key)
+
+    def history(self, key) -> typing.List[Origin]:
+        """ :return: origins of the current and previous values of `key`. """
+        i = self._origins.get(key)
+        if i is None:
+            i = self._base_source(key)
+        if i is None:
+            return []
+        return [self._resolve(j, key) for j in (i,) + self._history.get(key, ())]
+
+    def sources(self) -> typing.List[str]:
+        return [s.name for s in self._sources]
+
+    def _resolve(self, i: int, key) -> Origin:
+        s = self._sources[i]
+        return Origin(s.name, self._line(s, key))
+
+    @staticmethod
+    def _line(s: _Source, key) -> typing.Optional[int]:
+        if s.lines is None:
+            if s.lazy is not None:
+                offsets = ((k, v[0]) for k, v in s.lazy._index.items())
+                s.lines = _lines(s.lazy._buf, sorted(offsets, key=_offset))
+            elif s.path is None or s.signature is None:
+                return None
+            else:
+                if _signature(s.path) != s.signature:
+                    # changed since it was loaded
+                    return None
+                try:
+                    with open(s.path, "rb") as f:
+                        raw = f.read()
+                    s.lines = _line_index(raw, s.path)
+                except (OSError, UnicodeDecodeError, ValueError):
+                    return None
+        elif s.lazy is None and _signature(s.path) != s.signature:
+            return None
+        return s.lines.get(key)
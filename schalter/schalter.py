@@ -4,26 +4,101 @@
 
 """
 
+# annotations are not evaluated: pathlib is only imported when files are used
+# (see `_LazyPathlib`)
+from __future__ import annotations
+
+import io
 import os
-import logging
-import pathlib
-import inspect
+import functools
 import typing
-from contextlib import ContextDecorator
-from decorator import decorate
-from ruamel.yaml import YAML
-
+import threading
+import weakref
+from collections import ChainMap
+from time import perf_counter
+from types import MappingProxyType
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+
+from . import backends
+from .access_tracker import AccessTracker
 from .config_scope import ConfigScope
-
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-formatter = logging.Formatter(
-    fmt="%(asctime)s - %(levelname)s - %(module)s - %(message)s"
+from .call_plan import CallPlan
+from .key_index import KeyTrie
+from .key_table import ConfigStore
+from .provenance import (
+    DEFAULT,
+    IMPORTED,
+    MANUAL,
+    SHARED,
+    STRING,
+    Origin,
+    ProvenanceStore,
 )
-handler = logging.StreamHandler()
-handler.setFormatter(formatter)
-handler.setLevel(logging.INFO)
-logger.addHandler(handler)
+
+
+def _setup_logger():
+    import logging
+
+    _logger = logging.getLogger(__name__)
+    if not getattr(_logger, "schalter_setup", False):
+        # keep a level that was configured before the first use
+        if _logger.level == logging.NOTSET:
+            _logger.setLevel(logging.INFO)
+        formatter = logging.Formatter(
+            fmt="%(asctime)s - %(levelname)s - %(module)s - %(message)s"
+        )
+        handler = logging.StreamHandler()
+        handler.setFormatter(formatter)
+        handler.setLevel(logging.INFO)
+        _logger.addHandler(handler)
+        _logger.schalter_setup = True
+    return _logger
+
+
+class _LazyLogger:
+    """ Stands in for the module logger until it is first used.
+    `logging` is only imported and set up then.
+    """
+
+    def __getattr__(self, item):
+        global logger
+        logger = _setup_logger()
+        return getattr(logger, item)
+
+
+logger = _LazyLogger()
+
+if typing.TYPE_CHECKING:
+    import pathlib
+else:
+
+    class _LazyPathlib:
+        """ Stands in for `pathlib` in annotations (`typing.get_type_hints`)
+        until it is first used.
+        """
+
+        def __getattr__(self, item):
+            global pathlib
+            import pathlib as module
+
+            pathlib = module
+            return getattr(pathlib, item)
+
+    pathlib = _LazyPathlib()
+
+_MISSING = object()
+
+
+def _deep_merge(base: typing.Mapping, update: typing.Mapping) -> dict:
+    # new mapping: `update` merged into `base`, recursively for nested mappings
+    merged = dict(base)
+    for k, v in update.items():
+        current = merged.get(k)
+        if isinstance(v, typing.Mapping) and isinstance(current, typing.Mapping):
+            v = _deep_merge(current, v)
+        merged[k] = v
+    return merged
 
 
 class _SchalterMeta(type):
@@ -46,6 +121,16 @@ class _SchalterMeta(type):
         return cls.get_config().__contains__(item)
 
 
+class _PendingChanges:
+    """ Changed keys of a transaction. """
+
+    __slots__ = ("keys", "open")
+
+    def __init__(self):
+        self.keys = set()
+        self.open = True
+
+
 class ImmutableValues:
     def __init__(self):
         self._x = {}
@@ -56,6 +141,9 @@ class ImmutableValues:
     def __setitem__(self, key, value):
         return self.set(key, value)
 
+    def keys(self):
+        return self._x.keys()
+
     def set(self, key, value):
         if key not in self._x:
             self._x[key] = value
@@ -68,17 +156,66 @@ class ImmutableValues:
 class Schalter(object, metaclass=_SchalterMeta):
 
     DEFAULT_ENV_VAR_NAME = "SCHALTER_CONFIG_LOC"
+    # parsed config files are cached in this folder (default: inside the
+    # configuration base location)
+    CACHE_ENV_VAR_NAME = "SCHALTER_CACHE_LOC"
+    CACHE_FOLDER_NAME = ".schalter_cache"
     _configurations = {}
     Unset = object()
     _scope = ConfigScope()
 
-    def __init__(self, name="default"):
-        self._raw_configs = []
-        self._config = {}
+    def __init__(
+        self,
+        name="default",
+        copy_on_write: bool = False,
+        scope_fallback: bool = False,
+        compact: bool = False,
+    ):
+        # origin of every key (source and line), see `key_origin`
+        self._provenance = ProvenanceStore()
+        # compact: values in a list indexed by interned key ids (see ConfigStore)
+        self._config = ConfigStore() if compact else {}
+        # copy-on-write mode: the published config dict is never mutated.
+        # Writers publish a new dict under the lock, readers load it once.
+        self._copy_on_write = copy_on_write
+        self._write_lock = threading.Lock()
         # default values can only be set once and are immutable
         self.default_values = ImmutableValues()
         self._overrides_manual = {}
         self.name = name
+        # incremented on every mutation of the configuration
+        self._version = 0
+        # key -> version of its last change. Resolved values of a version
+        # before `_reset_version` are never reused (all keys may have changed).
+        self._key_versions = {}
+        self._reset_version = 0
+        # hierarchical index of the config keys, built on first use
+        self._index = None
+        # scoped keys fall back to parent scopes: A/B/x -> A/x -> x
+        self._scope_fallback = scope_fallback
+        # (scope, key) -> candidate keys, and (version, {(scope, key): key found})
+        self._fallback_chains = {}
+        self._fallback_resolved = (-1, {})
+        # change subscriptions: key -> callbacks, key prefix -> callbacks.
+        # The lists are replaced, never mutated, while dispatching may run.
+        self._key_subscribers = {}
+        self._prefix_subscribers = {}
+        # changed keys are collected until the outermost transaction ends,
+        # separately per thread and asyncio task (None: no transaction)
+        self._transaction = ContextVar(
+            "schalter_transaction_{}".format(id(self)), default=None
+        )
+        # instrumentation hooks of all configured functions of this config
+        self._hooks = ()
+        self._stats = None
+        self._configured_functions = weakref.WeakSet()
+        # shared memory store (see `share_config`), its version seen here and
+        # the sync function of configured functions (None if not shared)
+        self._shared = None
+        self._shared_version = 0
+        self._shared_sync = None
+        # keys read by configured functions (when resolved) and `Schalter[...]`
+        self._access = AccessTracker()
 
     def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
@@ -92,8 +229,28 @@ class Schalter(object, metaclass=_SchalterMeta):
         return self._config
 
     def _load_config(
-        self, config_name: str, only_update: bool = False, env_var_name: str = None
+        self,
+        config_name: str,
+        only_update: bool = False,
+        env_var_name: str = None,
+        use_cache: bool = True,
+    ) -> typing.FrozenSet[str]:
+        config_file, cache_dir = self._find_config_file(
+            config_name, env_var_name, use_cache
+        )
+        logger.info("Loading/appending config from {}".format(str(config_file)))
+        return self._update(config_file, only_update, cache_dir=cache_dir)
+
+    @staticmethod
+    def _find_config_file(
+        config_name: str, env_var_name: str = None, use_cache: bool = True
     ):
+        """ Path of a named config file in the configuration base location.
+
+        :return: (config file, cache folder or None)
+        """
+        import pathlib
+
         try:
             env_var_name = (
                 env_var_name
@@ -106,14 +263,23 @@ class Schalter(object, metaclass=_SchalterMeta):
             if not pathlib.Path(config_base_folder).is_dir():
                 raise RuntimeError("Cannot determine configuration base location")
 
-        if not config_name.endswith(".yaml"):
-            config_name += ".yaml"
-
         config_file: pathlib.Path = config_base_folder / pathlib.Path(config_name)
+        if config_file.suffix.lower() not in backends.extensions():
+            # no known extension: first existing file of any backend, else .yaml
+            candidates = [
+                config_file.with_name(config_file.name + ext)
+                for ext in backends.extensions()
+            ]
+            config_file = next((c for c in candidates if c.exists()), candidates[0])
 
         if config_file.is_file():
-            logger.info("Loading/appending config from {}".format(str(config_file)))
-            self._update(config_file, only_update)
+            cache_dir = None
+            if use_cache:
+                cache_dir = os.environ.get(
+                    Schalter.CACHE_ENV_VAR_NAME,
+                    os.path.join(config_base_folder, Schalter.CACHE_FOLDER_NAME),
+                )
+            return config_file, cache_dir
 
         elif config_file.exists():
             raise FileExistsError(
@@ -125,101 +291,966 @@ class Schalter(object, metaclass=_SchalterMeta):
                 "Cannot find config file '{}'.".format(str(config_file))
             )
 
+    def _load_configs(
+        self,
+        config_names: typing.Sequence[str],
+        deep_merge: bool = False,
+        executor=None,
+        env_var_name: str = None,
+        use_cache: bool = True,
+    ) -> typing.FrozenSet[str]:
+        found = [
+            self._find_config_file(name, env_var_name, use_cache)
+            for name in config_names
+        ]
+        return self._load_files(found, deep_merge, executor)
+
+    def load_config_files(
+        self,
+        paths: typing.Sequence[pathlib.Path],
+        deep_merge: bool = False,
+        executor=None,
+    ) -> typing.FrozenSet[str]:
+        """ Load several config files on top of the current configuration.
+        The files are parsed in parallel and merged in the given order.
+
+        :param deep_merge: merge nested mappings with the mappings of earlier
+        files (and the current configuration) instead of replacing them.
+        :param executor: a `concurrent.futures` executor to parse the files in
+        (default: a thread pool). A `ProcessPoolExecutor` parses pure Python
+        YAML in parallel.
+        :return: the changed keys.
+        """
+        return self._load_files([(p, None) for p in paths], deep_merge, executor)
+
+    def _load_files(self, found, deep_merge: bool, executor):
+        for config_file, _ in found:
+            logger.info("Loading/appending config from {}".format(str(config_file)))
+        if len(found) < 2:
+            loaded = [(f, self._read_config_file(f, c)) for f, c in found]
+        elif executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(len(found), 32)) as executor:
+                loaded = self._parse_all(found, executor)
+        else:
+            loaded = self._parse_all(found, executor)
+        return self._apply(loaded, deep_merge=deep_merge)
+
+    @staticmethod
+    def _parse_all(found, executor):
+        files = [f for f, _ in found]
+        parsed = executor.map(
+            Schalter._read_config_file, files, [c for _, c in found]
+        )
+        return list(zip(files, parsed))
+
+    async def _aload_config(
+        self,
+        config_names: typing.Sequence[str],
+        only_update: bool = False,
+        env_var_name: str = None,
+        use_cache: bool = True,
+        executor=None,
+    ) -> typing.FrozenSet[str]:
+        def read(config_name):
+            config_file, cache_dir = self._find_config_file(
+                config_name, env_var_name, use_cache
+            )
+            logger.info("Loading/appending config from {}".format(str(config_file)))
+            return config_file, self._read_config_file(config_file, cache_dir)
+
+        return await self._aload(read, config_names, only_update, executor)
+
+    async def aload_config_from_file(
+        self,
+        *paths: pathlib.Path,
+        only_update: bool = False,
+        executor=None,
+    ) -> typing.FrozenSet[str]:
+        """ Awaitable `load_config_from_file` for several files. The files are
+        read and parsed concurrently in `executor` (default: the loop's default
+        executor), then applied at once in the given order.
+
+        :return: the changed keys.
+        """
+
+        def read(path):
+            logger.info("Loading/appending config from {}".format(str(path)))
+            return path, self._read_config_file(path)
+
+        return await self._aload(read, paths, only_update, executor)
+
+    async def _aload(self, read, sources, only_update: bool, executor):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        loaded = await asyncio.gather(
+            *(loop.run_in_executor(executor, read, source) for source in sources)
+        )
+        return self._apply(loaded, only_update)
+
     def set_config(self, config: str):
         """
         Example string: "{some_key: True, another_key: 4}"
         """
         logger.info("Loading/appending config string {}".format(config))
-        yaml = YAML(typ="safe")
-        config_data = yaml.load(config)
-        self._raw_configs.append(("<str>", config_data))
-        self._config.update(config_data)
+        config_data = backends.yaml_backend.loads(config)
+        self._write(config_data, source=STRING)
 
     def load_config_from_file(
-        self, path_config: pathlib.Path, only_update: bool = False
-    ):
+        self,
+        path_config: pathlib.Path,
+        only_update: bool = False,
+        lazy: bool = False,
+    ) -> typing.FrozenSet[str]:
+        """ Load a config file on top of the current configuration.
+
+        :param only_update: only write the keys whose values differ from the
+        current configuration (e.g. to reload a changed file). Keys that are
+        missing in the file are kept.
+        :param lazy: only index the top-level keys of a YAML file and parse a
+        value when its key is first accessed. Files that cannot be indexed
+        (other formats, anchors and aliases, ...) are loaded eagerly.
+        :return: the changed keys.
+        """
         logger.info("Loading/appending config from {}".format(str(path_config)))
-        self._update(path_config, only_update)
+        if lazy:
+            if only_update:
+                raise ValueError("Lazy loading does not support only_update.")
+            keys = self._attach_lazy(path_config)
+            if keys is not None:
+                return keys
+            logger.info("Cannot index {}, loading it eagerly".format(str(path_config)))
+        return self._update(path_config, only_update)
+
+    def _attach_lazy(self, path_config) -> typing.Optional[typing.FrozenSet[str]]:
+        # use an indexed YAML file as read-only base on top of the current
+        # configuration. Returns None if the file cannot be indexed.
+        if (
+            hasattr(path_config, "read")
+            # values in a shared store are written eagerly
+            or self._shared is not None
+            or not isinstance(
+                backends.get_backend(path_config, default=".yaml"),
+                backends.YamlBackend,
+            )
+        ):
+            return None
+        from .frozen_store import LayeredConfig
+        from .lazy_yaml import LazyYamlFile
+
+        lazy = LazyYamlFile.open(path_config)
+        if lazy is None:
+            return None
+        keys = frozenset(lazy)
+        with self._write_lock:
+            self._provenance.record_base(path_config, lazy, lazy)
+            self._mark_changed(keys)
+            # the previous config is not written to anymore
+            base = ChainMap(lazy, self._config) if len(self._config) else lazy
+            self._config = LayeredConfig(base)
+            self._version += 1
+            self._update_index(keys, ())
+        self._notify(keys)
+        return keys
+
+    def watch_config_files(
+        self, *paths: pathlib.Path, interval: float = 1.0, callback=None
+    ):
+        """ Reload the given config files in a background thread whenever they
+        change. Only changed keys are written.
+
+        :param callback: called as callback(path, changed keys) after a reload.
+        :return: the started `ConfigWatcher`; call `stop()` to end watching.
+        """
+        from .watcher import ConfigWatcher
 
-    def write_config_file(self, path_config: pathlib.Path):
-        yaml = YAML()
-        yaml.default_flow_style = False
-        yaml.dump(self._config, path_config)
+        return ConfigWatcher(self, paths, interval, callback).start()
 
-    def _update(self, config_file, only_update: bool = False):
+    def write_config_file(
+        self, path_config: pathlib.Path, only_accessed: bool = False
+    ):
+        """ The format is chosen by the file extension. Streams and unknown
+        extensions are written as YAML.
+
+        :param only_accessed: only write keys that were accessed (see
+        `access_report`) or that have a default value of a configured function.
+        """
+        config = self._config
+        if only_accessed:
+            keys = set(self._access.accessed())
+            keys.update(self.default_values.keys())
+            config = {k: v for k, v in config.items() if k in keys}
+        backends.get_backend(path_config, default=".yaml").dump(config, path_config)
+
+    def stream_config_file(
+        self,
+        path_config: pathlib.Path,
+        order: str = "insertion",
+        flow_style: bool = False,
+    ) -> int:
+        """ Write the configuration as YAML entry by entry, without building a
+        representation of the whole configuration (see `stream_writer`).
+
+        :param path_config: file path or text stream.
+        :param order: 'insertion', 'sorted' or 'grouped' (by key prefix).
+        :param flow_style: write lists and mappings in compact flow style.
+        :return: number of written entries.
+        """
+        from .stream_writer import write_yaml
+
+        if hasattr(path_config, "write"):
+            return write_yaml(self._config, path_config, order, flow_style)
+        with open(str(path_config), "w", encoding="utf-8") as f:
+            return write_yaml(self._config, f, order, flow_style)
+
+    def access_report(self) -> typing.Dict[str, typing.List[str]]:
+        """ Keys of the configuration that were accessed since the last
+        `reset_access_tracking`, and those that were not (unused keys).
+        Configured functions report their keys when their arguments are
+        resolved, i.e. not on every call.
+        """
+        access = self._access
+        accessed, unused = [], []
+        for k in self._config.keys():
+            (accessed if k in access else unused).append(k)
+        return {
+            "accessed": sorted(accessed, key=str),
+            "unused": sorted(unused, key=str),
+        }
+
+    def reset_access_tracking(self):
+        with self._write_lock:
+            self._access.reset()
+            # configured functions have to resolve (and report) their keys again
+            self._reset_version = self._version + 1
+            self._version += 1
+
+    def key_origin(self, key: str) -> typing.Optional[Origin]:
+        """ Where the current value of `key` came from.
+
+        :return: `Origin(source, line)` with the config file path (or '<str>',
+        '<manual>', '<default>', '<shared>') and the line of the key in the file
+        if known. None if the key has no value.
+        """
+        if key not in self._config:
+            return None
+        return self._provenance.origin(key)
+
+    def key_history(self, key: str) -> typing.List[Origin]:
+        """ Origins of the current and previous values of `key`, most recent
+        first. Keeps up to `history_depth` origins per key, see
+        `set_history_depth`.
+        """
+        if key not in self._config:
+            return []
+        return self._provenance.history(key)
+
+    def set_history_depth(self, depth: int):
+        """ Number of origins to keep per key (default: 1, the current one). """
+        self._provenance.set_history_depth(depth)
+
+    def _update(
+        self, config_file, only_update: bool = False, cache_dir=None
+    ) -> typing.FrozenSet[str]:
+        config_data = self._read_config_file(config_file, cache_dir)
+        return self._apply([(config_file, config_data)], only_update)
+
+    def _apply(
+        self,
+        loaded: typing.Sequence[typing.Tuple[typing.Any, typing.Mapping]],
+        only_update: bool = False,
+        deep_merge: bool = False,
+    ) -> typing.FrozenSet[str]:
+        # apply parsed config files [(config file, config data)] in this order
+        # with a single write
+        if deep_merge:
+            config = self._config
+            updates = {}
+            for _, config_data in loaded:
+                for k, v in config_data.items():
+                    if isinstance(v, typing.Mapping):
+                        base = updates[k] if k in updates else config.get(k)
+                        if isinstance(base, typing.Mapping):
+                            v = _deep_merge(base, v)
+                    updates[k] = v
+        elif len(loaded) == 1:
+            updates = loaded[0][1]
+        else:
+            updates = {}
+            for _, config_data in loaded:
+                updates.update(config_data)
         if only_update:
-            raise NotImplementedError()
+            updates = self._diff(updates)
+        if updates:
+            # later files win
+            for config_file, config_data in loaded:
+                keys = config_data.keys()
+                if only_update:
+                    keys = [k for k in keys if k in updates]
+                self._provenance.record(config_file, keys)
+            self._write(updates, source=None)
+        return frozenset(updates)
+
+    def _diff(self, config_data: typing.Mapping) -> dict:
+        # the entries of `config_data` that would change the configuration
+        config = self._config
+        changes = {}
+        for k, v in config_data.items():
+            current = config.get(k, _MISSING)
+            # 1 == True: a changed type is a change
+            if current is not v and (current != v or type(current) is not type(v)):
+                changes[k] = v
+        return changes
+
+    @staticmethod
+    def _read_config_file(config_file, cache_dir=None):
+        """ Parse a config file, through the on-disk cache in `cache_dir` if
+        given. Pickle snapshots are not cached, they are already fast to load.
+        """
+        backend = backends.get_backend(config_file, default=".yaml")
+        if (
+            cache_dir is None
+            or hasattr(config_file, "read")
+            or isinstance(backend, backends.PickleBackend)
+        ):
+            return backend.load(config_file)
+
+        from . import config_cache
+
+        raw, header, config_data = config_cache.lookup(config_file, cache_dir)
+        if config_data is not config_cache.MISS:
+            logger.info("Config cache hit for {}".format(str(config_file)))
+            return config_data
+
+        logger.info("Config cache miss for {}".format(str(config_file)))
+        config_data = backend.load(io.BytesIO(raw))
+        try:
+            config_cache.store(config_file, cache_dir, header, config_data)
+        except OSError as e:
+            logger.warning("Cannot write config cache: {}".format(str(e)))
+        return config_data
+
+    def _write(self, updates: dict, publish: bool = True, source=MANUAL):
+        # all mutations of the configuration go through here.
+        # The config is published before the version is bumped: a reader that
+        # sees the new version also sees the new values.
+        # `source` is recorded as origin of the keys (None: already recorded).
+        if source is not None:
+            self._provenance.record(source, updates)
+        if publish and self._shared is not None:
+            self._publish_shared(self._shared.write, updates, len(updates))
+        if self._copy_on_write:
+            with self._write_lock:
+                self._mark_changed(updates)
+                config = self._config.copy()
+                config.update(updates)
+                self._config = config
+                self._version += 1
+                self._update_index(updates, ())
+        else:
+            self._mark_changed(updates)
+            self._config.update(updates)
+            self._version += 1
+            self._update_index(updates, ())
+        self._notify(updates)
+
+    def _mark_changed(self, keys: typing.Iterable[str]):
+        # keys are marked before their new values are published: a reader
+        # never takes a changed key for unchanged
+        self._key_versions.update(dict.fromkeys(keys, self._version + 1))
+
+    def _unchanged_since(self, version: int, keys: typing.Iterable[str]) -> bool:
+        """ True if none of `keys` changed after config version `version`. """
+        if version < self._reset_version:
+            return False
+        key_versions = self._key_versions
+        return all(key_versions.get(k, 0) <= version for k in keys)
+
+    def _delete(self, keys: typing.Iterable[str], publish: bool = True):
+        # remove keys from the configuration. Missing keys are ignored.
+        keys = list(keys)
+        if publish and self._shared is not None:
+            self._publish_shared(self._shared.delete, keys, len(keys))
+        self._provenance.forget(keys)
+        with self._write_lock:
+            config = self._config.copy() if self._copy_on_write else self._config
+            self._mark_changed(keys)
+            for k in keys:
+                if hasattr(config, "discard"):
+                    config.discard(k)
+                else:
+                    config.pop(k, None)
+            self._config = config
+            self._version += 1
+            self._update_index((), keys)
+        self._notify(keys)
+
+    def _update_index(
+        self, added: typing.Iterable[str], removed: typing.Iterable[str]
+    ):
+        index = self._index
+        if index is None:
+            return
+        for k in added:
+            index.add(k)
+        for k in removed:
+            if k in index:
+                index.remove(k)
+
+    def subscribe(
+        self,
+        callback: typing.Callable[[typing.FrozenSet[str]], None],
+        key: str = None,
+        prefix: str = None,
+    ):
+        """ Call `callback` with the changed keys whenever `key`, or any key
+        equal to or below `prefix` (`prefix/...`), is written or deleted.
+        Without `key` and `prefix`, all changes are reported.
+
+        The callback is called once per mutation (e.g. per loaded file) or once
+        per `transaction`, with all of its keys that changed.
+        """
+        if key is not None and prefix is not None:
+            raise ValueError("Subscribe to either a key or a prefix.")
+        with self._write_lock:
+            if key is not None:
+                subscribers = self._key_subscribers
+            else:
+                subscribers, key = self._prefix_subscribers, prefix or ""
+            subscribers[key] = subscribers.get(key, []) + [callback]
+
+    def unsubscribe(self, callback, key: str = None, prefix: str = None):
+        """ Remove a subscription made with the same arguments.
 
-        yaml = YAML(typ="safe")  # default, if not specified, is 'rt' (round-trip)
-        config_data = yaml.load(config_file)
-        self._raw_configs.append((config_file, config_data))
-        self._config.update(config_data)
+        :raises ValueError: if there is no such subscription.
+        """
+        with self._write_lock:
+            if key is not None:
+                subscribers = self._key_subscribers
+            else:
+                subscribers, key = self._prefix_subscribers, prefix or ""
+            callbacks = list(subscribers.get(key, ()))
+            callbacks.remove(callback)
+            if callbacks:
+                subscribers[key] = callbacks
+            else:
+                del subscribers[key]
+
+    @contextmanager
+    def transaction(self):
+        """ Batch the change notifications of all writes in this context.
+        Subscribers are notified once, when the outermost transaction ends.
+        Writes of other threads and tasks are not batched.
+        """
+        if self._transaction.get() is not None:
+            # nested
+            yield self
+            return
+        pending = _PendingChanges()
+        token = self._transaction.set(pending)
+        try:
+            yield self
+        finally:
+            self._transaction.reset(token)
+            # tasks started in the transaction do not collect changes anymore
+            pending.open = False
+            if pending.keys:
+                self._dispatch(pending.keys)
+
+    def _notify(self, keys: typing.Iterable[str]):
+        if not (self._key_subscribers or self._prefix_subscribers):
+            return
+        pending = self._transaction.get()
+        if pending is not None and pending.open:
+            pending.keys.update(keys)
+        else:
+            self._dispatch(keys)
+
+    def _dispatch(self, keys: typing.Iterable[str]):
+        # subscribers are found per changed key: exact key, then every prefix
+        # of the key. Other subscribers are never looked at.
+        by_key = self._key_subscribers
+        by_prefix = self._prefix_subscribers
+        calls = {}
+        for k in keys:
+            for callback in by_key.get(k, ()):
+                calls.setdefault(callback, set()).add(k)
+            if not by_prefix or not isinstance(k, str):
+                continue
+            prefixes = [""]
+            i = k.find("/", 1)
+            while i >= 0:
+                prefixes.append(k[:i])
+                i = k.find("/", i + 1)
+            prefixes.append(k)
+            for p in prefixes:
+                for callback in by_prefix.get(p, ()):
+                    calls.setdefault(callback, set()).add(k)
+        for callback, changed in calls.items():
+            callback(frozenset(changed))
+
+    @property
+    def index(self) -> KeyTrie:
+        """ Hierarchical index of the config keys (built on first use). """
+        if self._index is None:
+            self._index = KeyTrie(self._config.keys())
+        return self._index
+
+    def subtree_keys(self, prefix: str) -> typing.List[str]:
+        """ All keys equal to `prefix` or below it (`prefix/...`). """
+        return list(self.index.subtree(prefix))
+
+    def iter_subtree(
+        self, prefix: str
+    ) -> typing.Iterator[typing.Tuple[str, typing.Any]]:
+        config = self._config
+        for k in self.subtree_keys(prefix):
+            yield k, config[k]
+
+    def export_subtree(self, prefix: str) -> dict:
+        """ The subtree below `prefix` with keys relative to the prefix.
+        A value for `prefix` itself has the empty key.
+        """
+        if not prefix:
+            return dict(self.iter_subtree(prefix))
+        return {k[len(prefix) + 1 :]: v for k, v in self.iter_subtree(prefix)}
+
+    def delete_subtree(self, prefix: str) -> int:
+        """ Delete `prefix` and all keys below it.
+
+        :return: number of deleted keys.
+        """
+        keys = self.subtree_keys(prefix)
+        if keys:
+            self._delete(keys)
+        return len(keys)
+
+    def set_copy_on_write(self, enabled: bool = True):
+        """ Switch to copy-on-write mode for concurrent readers.
+
+        Writes get more expensive (the config is copied), but readers always see
+        a consistent, immutable config without taking a lock.
+        """
+        with self._write_lock:
+            # never mutate a dict that may have been handed out as a snapshot
+            self._config = self._config.copy()
+            self._copy_on_write = enabled
+
+    def set_compact_store(self, enabled: bool = True):
+        """ Store the values in a `ConfigStore`: a list indexed by interned key
+        ids instead of a dict. Copies (copy-on-write mode, snapshots) only copy
+        the list, and configured functions look up their values by key id.
+        """
+        with self._write_lock:
+            config = self._config
+            if enabled and type(config) is dict:
+                self._config = ConfigStore(config)
+            elif not enabled and isinstance(config, ConfigStore):
+                self._config = dict(config.items())
+
+    def config_snapshot(self) -> typing.Mapping:
+        """ Read-only view of the current configuration that does not change
+        with later writes.
+        """
+        if self._copy_on_write:
+            return MappingProxyType(self._config)
+        return MappingProxyType(self._config.copy())
+
+    def freeze_config(self, path_store: pathlib.Path):
+        """ Write the configuration to a read-only store file that other
+        processes can attach to with `attach_frozen_config`.
+        """
+        from .frozen_store import freeze
+
+        freeze(self._config, path_store)
+
+    def attach_frozen_config(self, path_store: pathlib.Path):
+        """ Use a frozen store file (see `freeze_config`) as read-only base of
+        the configuration. The file is memory-mapped and shared between all
+        processes that attach to it; values are unpickled on first access.
+
+        Values in the store replace current values. Later writes are kept in
+        this process on top of the store.
+        """
+        from .frozen_store import FrozenConfigStore, LayeredConfig
+
+        if isinstance(path_store, FrozenConfigStore):
+            store = path_store
+        else:
+            store = FrozenConfigStore(path_store)
+        with self._write_lock:
+            current = self._config
+            if isinstance(current, LayeredConfig):
+                # on top of the previous base and overlay, which are not
+                # written to anymore
+                config = LayeredConfig(ChainMap(store, current))
+            else:
+                overlay = {k: v for k, v in current.items() if k not in store}
+                config = LayeredConfig(store, overlay)
+            self._provenance.record_base(store.path, store)
+            self._reset_version = self._version + 1
+            self._config = config
+            self._version += 1
+            self._index = None
+        # all values of the store, without iterating it if nobody subscribed
+        self._notify(store)
+
+    def _install(self, config: typing.Mapping):
+        # use `config` as the configuration (e.g. a `LayeredConfig` received
+        # from another process) without copying its values
+        with self._write_lock:
+            self._reset_version = self._version + 1
+            self._config = config
+            self._version += 1
+            self._index = None
+            self._provenance.record_base(IMPORTED, config)
+        self._notify(config.keys())
+
+    def share_config(self, name: str = None, lock=None, **kwargs):
+        """ Move the configuration into a new shared memory store that other
+        processes attach to with `attach_shared_config` (pool workers attach
+        automatically, see `pool_kwargs`). Writes of all attached processes
+        are seen by all others.
+
+        :param lock: `multiprocessing.Lock` if several processes write.
+        :param kwargs: sizes of the store, see `SharedConfigStore.create`.
+        :return: the store. The creating process unlinks it when done:
+        `store.close(); store.unlink()`.
+        """
+        from .shared_store import SharedConfigStore
+
+        store = SharedConfigStore.create(
+            dict(self._config.items()), name=name, lock=lock, **kwargs
+        )
+        self.attach_shared_config(store)
+        return store
+
+    def attach_shared_config(self, store):
+        """ Use a shared memory store (see `share_config`). Values in the
+        store replace current values. Configured functions check the store
+        version on every call and only read the keys that changed.
+
+        :param store: a `SharedConfigStore` or its name.
+        """
+        from .shared_store import SharedConfigStore
+
+        if not isinstance(store, SharedConfigStore):
+            store = SharedConfigStore(store)
+        self._shared = store
+        self._shared_version = 0
+        self._shared_sync = self._sync_shared
+        self._sync_shared()
+        for f in list(self._configured_functions):
+            f.schalter_set_sync(self._shared_sync)
+
+    def _sync_shared(self):
+        store = self._shared
+        if store.version == self._shared_version:
+            return
+        version, updates, deleted = store.changes_since(self._shared_version)
+        self._shared_version = version
+        with self.transaction():
+            if updates:
+                self._write(updates, publish=False, source=SHARED)
+            if deleted:
+                self._delete(deleted, publish=False)
+
+    def _publish_shared(self, publish, items, n: int):
+        seen = self._shared_version
+        version = publish(items)
+        if version - n == seen:
+            # no other process wrote in between: no need to read back
+            self._shared_version = version
+
+    def set_scope_fallback(self, enabled: bool = True):
+        """ If enabled, a scoped key that is missing in the current scope is
+        looked up in the parent scopes: `A/B/x`, then `A/x`, then `x`.
+        """
+        self._scope_fallback = enabled
+        self._reset_version = self._version + 1
+        self._version += 1
+
+    def _fallback_lookup(self, config: typing.Mapping, scope: str, key: str):
+        return config[self._fallback_key(config, scope, key)]
+
+    def _fallback_key(self, config: typing.Mapping, scope: str, key: str) -> str:
+        # the key that a scoped lookup falls back to (the first one of the chain
+        # if none exists). Resolved chains are memoized until the next write.
+        version = self._version
+        resolved = self._fallback_resolved
+        if resolved[0] != version:
+            resolved = self._fallback_resolved = (version, {})
+        try:
+            found = resolved[1][(scope, key)]
+        except KeyError:
+            try:
+                chain = self._fallback_chains[(scope, key)]
+            except KeyError:
+                parts = scope.split("/") if scope else []
+                chain = tuple(
+                    "/".join(parts[:i] + [key]) for i in range(len(parts), -1, -1)
+                )
+                if not scope:
+                    # scoped key outside of any scope
+                    chain = ("/" + key,) + chain
+                self._fallback_chains[(scope, key)] = chain
+            found = next((k for k in chain if k in config), chain[0])
+            resolved[1][(scope, key)] = found
+        return found
+
+    def add_hook(self, hook):
+        """ Install an instrumentation hook (see `CallHook`) into all configured
+        functions of this configuration.
+        """
+        self._set_hooks(self._hooks + (hook,))
+
+    def remove_hook(self, hook):
+        """ :raises ValueError: if the hook is not installed. """
+        hooks = list(self._hooks)
+        hooks.remove(hook)
+        self._set_hooks(tuple(hooks))
+
+    def _set_hooks(self, hooks: tuple):
+        self._hooks = hooks
+        for f in list(self._configured_functions):
+            f.schalter_set_hooks(hooks)
+
+    def set_instrumentation(self, enabled: bool = True):
+        """ Collect call statistics of the configured functions (see
+        `call_stats`). Disabled instrumentation has no cost per call.
+        """
+        if enabled and self._stats is None:
+            from .instrumentation import CallStats
+
+            self._stats = CallStats()
+            self.add_hook(self._stats)
+        elif not enabled and self._stats is not None:
+            self.remove_hook(self._stats)
+            self._stats = None
+
+    def call_stats(self, reset: bool = False) -> dict:
+        """ Statistics collected since instrumentation was enabled:
+        {"functions": {name: {"calls", "misses", "resolve_seconds",
+        "call_seconds"}}, "keys": {key: hits}, "scopes": {scope path: calls}}.
+        Empty if instrumentation is disabled.
+        """
+        if self._stats is None:
+            return {"functions": {}, "keys": {}, "scopes": {}}
+        stats = self._stats.snapshot()
+        if reset:
+            self._stats.reset()
+        return stats
+
+    @property
+    def version(self) -> int:
+        return self._version
 
     def set_default(self, param: str, value):
         self.default_values[param] = value
         if param not in self._config:
-            self._config[param] = value
+            self._write({param: value}, source=DEFAULT)
 
     def set_manual(self, param: str, value):
-        self._config[param] = value
+        self._write({param: value})
 
-    def make_call_decorated_function(self, mapping: {str: (str, typing.Any, bool)}):
+    def make_configured_function(
+        self, f, mapping: {str: (str, typing.Any, bool)},
+    ):
         """
 
+        :param f: original function.
         :param mapping: keyword args to be configured or mapped to a specific key.
         {LOCAL_NAME (name in func kwargs):
             (CONFIG_NAME, value if not supplied, is_scoped)}
 
-        :return:
+        :return: wrapper that calls `f` with the configured kwargs filled in.
+        Resolved kwargs are cached until one of their config keys changes.
+        The mapping is compiled into a call plan that is only rebuilt through
+        `wrapper.schalter_compile_plan`.
         """
-
-        def call_decorated_function(f, *args, **kw):
-            # save all supplied args that are marked as to be configured
-            # this first line also contains default values
-            manual_params = set(kw.keys()).intersection(mapping.keys())
-            # filter out all params that are actually default values
-            if f.__kwdefaults__ is not None:
-                supplied_by_default = set(
-                    p
-                    for p in manual_params
-                    if (p in f.__kwdefaults__ and kw[p] is f.__kwdefaults__[p])
-                )
+        plan = CallPlan(mapping, f.__kwdefaults__)
+        # counts recompilations of the plan: bound functions re-resolve then
+        generation = 0
+        # resolved kwargs per scope path:
+        # {scope: (config version, kwargs, config keys or None if unknown)}
+        cache = {}
+        scope = self._scope
+        # instrumentation hooks (None if disabled) and shared store sync.
+        # Calls take the detour if there are hooks or a shared store.
+        hooks = self._hooks or None
+        sync = self._shared_sync
+        detour = None
+
+        def compile_plan():
+            nonlocal plan, cache, generation
+            plan = CallPlan(mapping, f.__kwdefaults__)
+            cache = {}
+            generation += 1
+
+        def update_detour():
+            nonlocal detour
+            if hooks is not None or sync is not None:
+                detour = detour_call
             else:
-                supplied_by_default = set()
-
-            manual_params = manual_params - supplied_by_default
-
-            current_scope = self._scope.fullname
-            scoped_mapping = {
-                k: (current_scope + "/" + v[0] if v[2] else v[0], v[1])
-                for k, v in mapping.items()
-            }
-
-            for p in manual_params:
-                self.set_manual(scoped_mapping[p][0], kw[p])
-
-            kwargs_to_add = mapping.keys() - manual_params
+                detour = None
+
+        def set_hooks(new_hooks):
+            nonlocal hooks
+            hooks = new_hooks or None
+            update_detour()
+
+        def set_sync(new_sync):
+            nonlocal sync
+            sync = new_sync
+            update_detour()
+
+        def record_supplied(current_scope, kw):
+            # save all supplied args that are marked as to be configured.
+            # A value that IS the function default was not supplied.
+            by_name = plan.by_name
+            for local_name in kw.keys() & by_name.keys():
+                config_name, is_scoped, default = by_name[local_name]
+                value = kw[local_name]
+                if value is not default:
+                    if is_scoped:
+                        config_name = current_scope + "/" + config_name
+                    self.set_manual(config_name, value)
+
+        def refresh(current_scope, version, entry, args, kw):
+            if entry is not None:
+                # keep the resolved values if none of their keys changed
+                if entry[2] is not None and self._unchanged_since(entry[0], entry[2]):
+                    entry = cache[current_scope] = (version,) + entry[1:]
+                    return entry
             try:
-                kw.update({k: self.config[scoped_mapping[k][0]] for k in kwargs_to_add})
+                if self._scope_fallback:
+                    # fallback keys can appear anywhere along the chain
+                    kwargs = plan.resolve(
+                        self._config, current_scope, self._fallback_lookup
+                    )
+                    found = tuple(
+                        self._fallback_key(self._config, current_scope, config_name)
+                        if is_scoped
+                        else config_name
+                        for _, config_name, is_scoped, _ in plan.entries
+                    )
+                    self._access.mark_all(found)
+                    keys = None
+                else:
+                    kwargs = plan.resolve(self._config, current_scope)
+                    keys = found = plan.keys(current_scope)
+                    self._access.mark_ids(plan.key_ids(current_scope))
             except KeyError as e:
-                raise KeyError("Value missing in configuration: {}.".format(str(e)))
+                if args is not None:
+                    # a call with wrong arguments is reported as such first
+                    import inspect
 
-            # replace defaults with actual value if:
-            # * key is configured (== in mapping)
-            # * key has a function default value (== in __kwdefaults__)
-            # * value IS the actual function default value (not user supplied)
-            if f.__kwdefaults__ is not None:
-                default_values = {
-                    k: v.value
-                    for k, v in kw.items()
-                    if k in mapping
-                    and k in f.__kwdefaults__
-                    and v is f.__kwdefaults__[k]
-                }
-                kw.update(default_values)
-            return f(*args, **kw)
+                    inspect.signature(f).bind(*args, **{**plan.by_name, **kw})
+                raise KeyError("Value missing in configuration: {}.".format(str(e)))
+            # (version, values, keys to validate the values, keys looked up)
+            entry = cache[current_scope] = (version, kwargs, keys, found)
+            return entry
+
+        def instrumented_call(current_scope, args, kw, call_hooks):
+            start = perf_counter()
+            if kw:
+                record_supplied(current_scope, kw)
+            version = self._version
+            entry = cache.get(current_scope)
+            missed = entry is None or entry[0] != version
+            if missed:
+                entry = refresh(current_scope, version, entry, args, kw)
+            keys = entry[3]
+            kwargs = {**entry[1], **kw} if kw else entry[1]
+            called = perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                seconds = perf_counter() - called
+                for hook in call_hooks:
+                    hook.on_call(
+                        configured_function,
+                        current_scope,
+                        keys,
+                        missed,
+                        called - start,
+                        seconds,
+                    )
 
-        return call_decorated_function
+        def detour_call(current_scope, args, kw):
+            if sync is not None:
+                # pull the changes of other processes
+                sync()
+            # hooks can be removed by other threads during the call
+            call_hooks = hooks
+            if call_hooks is not None:
+                return instrumented_call(current_scope, args, kw, call_hooks)
+            if kw:
+                record_supplied(current_scope, kw)
+            version = self._version
+            entry = cache.get(current_scope)
+            if entry is None or entry[0] != version:
+                entry = refresh(current_scope, version, entry, args, kw)
+            if kw:
+                return f(*args, **{**entry[1], **kw})
+            return f(*args, **entry[1])
+
+        @functools.wraps(f)
+        def configured_function(*args, **kw):
+            current_scope = scope.fullname if plan.has_scoped else ""
+            if detour is not None:
+                return detour(current_scope, args, kw)
+            if kw:
+                record_supplied(current_scope, kw)
+
+            version = self._version
+            entry = cache.get(current_scope)
+            if entry is None or entry[0] != version:
+                entry = refresh(current_scope, version, entry, args, kw)
+
+            if kw:
+                return f(*args, **{**entry[1], **kw})
+            return f(*args, **entry[1])
+
+        def bind():
+            # resolved once for the current scope, re-resolved on config changes
+            # and when the plan is recompiled (e.g. by `Schalter.prefix`)
+            bind_scope = scope.fullname
+            bound_generation = generation
+            bound_scope = bind_scope if plan.has_scoped else ""
+            entry = cache.get(bound_scope)
+            entry = refresh(bound_scope, self._version, entry, None, None)
+
+            @functools.wraps(f)
+            def bound_function(*args, **kw):
+                nonlocal entry, bound_generation, bound_scope
+                if bound_generation != generation:
+                    bound_generation = generation
+                    bound_scope = bind_scope if plan.has_scoped else ""
+                    # resolved with the previous mapping: refreshed below
+                    entry = (None, None, None, None)
+                if detour is not None:
+                    return detour(bound_scope, args, kw)
+                if kw:
+                    record_supplied(bound_scope, kw)
+                    if entry[0] != self._version:
+                        entry = refresh(bound_scope, self._version, entry, args, kw)
+                    return f(*args, **{**entry[1], **kw})
+                if entry[0] != self._version:
+                    entry = refresh(bound_scope, self._version, entry, args, kw)
+                return f(*args, **entry[1])
+
+            return bound_function
+
+        configured_function.schalter_compile_plan = compile_plan
+        configured_function.schalter_bind = bind
+        configured_function.schalter_set_hooks = set_hooks
+        configured_function.schalter_set_sync = set_sync
+        self._configured_functions.add(configured_function)
+        update_detour()
+        return configured_function
 
     @staticmethod
     def clear():
@@ -232,34 +1263,170 @@ class Schalter(object, metaclass=_SchalterMeta):
         return Schalter._configurations[name]
 
     @staticmethod
-    def get(*args, **kw):
-        return Schalter.get_config().config.get(*args, **kw)
+    def freeze(path_store: pathlib.Path):
+        Schalter.get_config().freeze_config(path_store)
+
+    @staticmethod
+    def attach(path_store: pathlib.Path):
+        Schalter.get_config().attach_frozen_config(path_store)
+
+    @staticmethod
+    def origin(key: str) -> typing.Optional[Origin]:
+        return Schalter.get_config().key_origin(key)
+
+    @staticmethod
+    def history(key: str) -> typing.List[Origin]:
+        return Schalter.get_config().key_history(key)
+
+    @staticmethod
+    def subtree(prefix: str) -> dict:
+        return Schalter.get_config().export_subtree(prefix)
+
+    @staticmethod
+    def snapshot() -> typing.Mapping:
+        return Schalter.get_config().config_snapshot()
+
+    @staticmethod
+    def export_state(names: typing.Iterable[str] = None) -> bytes:
+        """ Pickled configurations and active scope, see `import_state`. """
+        from .process_pool import export_state
+
+        return export_state(names)
+
+    @staticmethod
+    def import_state(blob: bytes):
+        """ Replace all configurations by exported ones (see `export_state`). """
+        from .process_pool import import_state
+
+        import_state(blob)
+
+    @staticmethod
+    def pool_kwargs(names: typing.Iterable[str] = None) -> dict:
+        """ Initializer arguments for process pools: workers start with the
+        current configurations and scope, also with the 'spawn' start method.
+
+            ProcessPoolExecutor(max_workers=4, **Schalter.pool_kwargs())
+        """
+        from .process_pool import pool_kwargs
+
+        return pool_kwargs(names)
+
+    @staticmethod
+    def bind(f):
+        """ Fast callable for many calls of a configured function `f` in the
+        current scope. The configured arguments are resolved once; the callable
+        only re-resolves them if the configuration changed.
+
+        :raises ValueError: if `f` is not a configured function.
+        :raises KeyError: if a configured value is missing.
+        """
+        try:
+            bind = f.schalter_bind
+        except AttributeError:
+            raise ValueError("Function '{}' is not configured.".format(f.__name__))
+        return bind()
+
+    @staticmethod
+    def stats(reset: bool = False) -> dict:
+        return Schalter.get_config().call_stats(reset)
+
+    @staticmethod
+    def get(key, default=None):
+        config = Schalter.get_config()
+        if config._shared is not None:
+            config._sync_shared()
+        value = config.config.get(key, _MISSING)
+        if value is _MISSING:
+            # probes of missing keys are not tracked (nor interned)
+            return default
+        config._access.mark(key)
+        return value
 
     @staticmethod
     def _getitem(item):
-        return Schalter.get_config().config[item]
+        config = Schalter.get_config()
+        if config._shared is not None:
+            config._sync_shared()
+        value = config.config[item]
+        config._access.mark(item)
+        return value
 
     @staticmethod
     def set(key, value):
-        Schalter.get_config().config[key] = value
+        Schalter.get_config().set_manual(key, value)
 
     @staticmethod
     def load_config(
-        config_name: str, only_update: bool = False, env_var_name: str = None
-    ):
-        Schalter.get_config()._load_config(config_name, only_update, env_var_name)
+        config_name: str,
+        only_update: bool = False,
+        env_var_name: str = None,
+        use_cache: bool = True,
+    ) -> typing.FrozenSet[str]:
+        return Schalter.get_config()._load_config(
+            config_name, only_update, env_var_name, use_cache
+        )
+
+    @staticmethod
+    def load_configs(
+        config_names: typing.Sequence[str],
+        deep_merge: bool = False,
+        executor=None,
+        env_var_name: str = None,
+        use_cache: bool = True,
+    ) -> typing.FrozenSet[str]:
+        """ Load a stack of config names (e.g. base, hardware, dataset,
+        overrides). The files are parsed in parallel and merged in the given
+        order, see `load_config_files`.
+        """
+        return Schalter.get_config()._load_configs(
+            config_names, deep_merge, executor, env_var_name, use_cache
+        )
+
+    @staticmethod
+    async def aload_config(
+        *config_names: str,
+        only_update: bool = False,
+        env_var_name: str = None,
+        use_cache: bool = True,
+        executor=None,
+    ) -> typing.FrozenSet[str]:
+        """ Awaitable `load_config` for one or more config names. The files are
+        read and parsed concurrently in `executor` (default: the loop's default
+        executor), then applied at once in the given order.
+        """
+        return await Schalter.get_config()._aload_config(
+            config_names, only_update, env_var_name, use_cache, executor
+        )
+
+    @staticmethod
+    async def aload_config_from_file_default(
+        *paths: pathlib.Path, only_update: bool = False, executor=None
+    ) -> typing.FrozenSet[str]:
+        return await Schalter.get_config().aload_config_from_file(
+            *paths, only_update=only_update, executor=executor
+        )
 
     @staticmethod
     def load_config_from_file_default(
-        path_config: pathlib.Path, only_update: bool = False
-    ):
-        Schalter.get_config().load_config_from_file(path_config, only_update)
+        path_config: pathlib.Path, only_update: bool = False, lazy: bool = False
+    ) -> typing.FrozenSet[str]:
+        return Schalter.get_config().load_config_from_file(
+            path_config, only_update, lazy
+        )
 
     @staticmethod
-    def write_config(path_config: pathlib.Path):
+    def write_config(path_config: pathlib.Path, only_accessed: bool = False):
         if len(Schalter._configurations) > 1:
             raise ValueError("More than one configuration.")
-        Schalter.get_config().write_config_file(path_config)
+        Schalter.get_config().write_config_file(path_config, only_accessed)
+
+    @staticmethod
+    def stream_config(
+        path_config: pathlib.Path, order: str = "insertion", flow_style: bool = False
+    ) -> int:
+        if len(Schalter._configurations) > 1:
+            raise ValueError("More than one configuration.")
+        return Schalter.get_config().stream_config_file(path_config, order, flow_style)
 
     class Default:
         def __repr__(self):
@@ -273,6 +1440,7 @@ class Schalter(object, metaclass=_SchalterMeta):
         try:
             # try to update the mapping of an already decorated function
             mapping = f.schalter_mapping
+            compile_plan = f.schalter_compile_plan
 
             if force_update:
                 mapping.update(m)
@@ -293,12 +1461,12 @@ class Schalter(object, metaclass=_SchalterMeta):
 
                 mapping.update({k: v for k, v in m.items() if k not in updates})
 
-            f.schalter_f.__kwdefaults__ = f.__kwdefaults__
+            # the mapping changed: rebuild the call plan
+            compile_plan()
         except AttributeError:
             # first decoration of function. Save mapping and original function
-            setattr(f, "schalter_mapping", m)
-
-            decorated = decorate(f, self.make_call_decorated_function(m))
+            decorated = self.make_configured_function(f, m)
+            setattr(decorated, "schalter_mapping", m)
             setattr(decorated, "schalter_f", f)
             f = decorated
 
@@ -320,8 +1488,12 @@ class Schalter(object, metaclass=_SchalterMeta):
         :return:
         """
 
+        import inspect
+
         def _decorator(f):
-            argspec = inspect.getfullargspec(f)
+            # defaults are replaced on the original function, not the wrapper
+            original = getattr(f, "schalter_f", f)
+            argspec = inspect.getfullargspec(original)
             kwonly = set(argspec.kwonlyargs)
             defaults = argspec.kwonlydefaults
 
@@ -349,14 +1521,14 @@ class Schalter(object, metaclass=_SchalterMeta):
 
             # replace original function defaults with proxy objects
             # -> enables to check later if a param was supplied or a default used
-            if m and f.__kwdefaults__ is None:
-                f.__kwdefaults__ = {}
-            if f.__kwdefaults__ is not None:
+            if m and original.__kwdefaults__ is None:
+                original.__kwdefaults__ = {}
+            if original.__kwdefaults__ is not None:
                 for k, (_, v, _) in m.items():
                     if v is not Schalter.Unset:
-                        f.__kwdefaults__[k] = Schalter.Default(v)
+                        original.__kwdefaults__[k] = Schalter.Default(v)
                     else:
-                        f.__kwdefaults__[k] = Schalter.Unset
+                        original.__kwdefaults__[k] = Schalter.Unset
 
             # Register defaults.
             # Make sure defaults for the same parameter are consistent
@@ -379,6 +1551,8 @@ class Schalter(object, metaclass=_SchalterMeta):
 
     @staticmethod
     def prefix(prefix: str):
+        import inspect
+
         def _decorator(f):
             try:
                 c: Schalter = f.schalter_config
@@ -462,11 +1636,19 @@ class Schalter(object, metaclass=_SchalterMeta):
             return Schalter._make_decorator(mapping)
 
     class Scope(ContextDecorator):
+        # tokens of the entered scopes, per thread and asyncio task: instances
+        # can be shared, entered several times and used as decorators
+        _tokens = ContextVar("schalter_scope_tokens", default=())
+
         def __init__(self, name: str):
             self.name = name
 
         def __enter__(self) -> ConfigScope:
-            return Schalter._scope.make_scope(self.name)
+            token = Schalter._scope.make_scope(self.name)
+            Schalter.Scope._tokens.set(Schalter.Scope._tokens.get() + (token,))
+            return Schalter._scope
 
         def __exit__(self, exc_type, exc, exc_tb):
-            Schalter._scope.release_scope()
+            tokens = Schalter.Scope._tokens.get()
+            Schalter.Scope._tokens.set(tokens[:-1])
+            Schalter._scope.release_scope(tokens[-1])
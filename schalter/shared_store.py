@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Configuration shared between processes through shared memory.
+
+Every write increments the global version of the store. Each key has an entry
+with the version of its last change; a ring buffer holds the key of every
+version. A process that has seen version `v` finds all changed keys by reading
+the ring from `v + 1` and only unpickles their values. If it fell behind by
+more than the ring size, it compares the versions of all entries instead.
+
+Layout (native byte order, all fields uint64 unless noted):
+    header (16 words) | entries (capacity x 4 words) | ring (ring_size words)
+    | key directory (key_space bytes) | values (value_space bytes)
+An entry is (version, value offset, value length, allocated length). The
+directory holds the keys in order of their entry: uint16 length + UTF-8 key.
+
+Values are written in place if they fit their allocation, else appended. An
+entry is marked busy while it is written (a seqlock): readers retry until they
+read the same entry version before and after copying the value. Writers must be
+serialized: pass a `multiprocessing.Lock` to all processes that write.
+"""
+
+import multiprocessing
+import pickle
+import struct
+import sys
+import threading
+import typing
+import weakref
+from multiprocessing import shared_memory
+
+MAGIC = 0x314D485354484353
+
+# header fields
+_MAGIC, _CAPACITY, _RING, _KEY_SPACE, _VALUE_SPACE = 0, 1, 2, 3, 4
+_VERSION, _N_KEYS, _KEYS_END, _VALUES_END = 5, 6, 7, 8
+_HEADER_WORDS = 16
+_ENTRY_WORDS = 4
+
+_BUSY = 2 ** 64 - 1
+# value length of deleted keys
+_DELETED = 2 ** 64 - 1
+_KEY_LENGTH = struct.Struct("=H")
+
+
+# segments registered with the resource tracker of this process
+_registered = set()
+
+
+def _open(name: str, tracked: bool) -> shared_memory.SharedMemory:
+    # the creator owns (and unlinks) the segment
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Before 3.13 every process registers the segment with its resource
+    # tracker, which unlinks it (for all processes) when the process exits.
+    # A tracker that is shared with the creator keeps the registration of the
+    # creator: unregistering would drop it.
+    if tracked or shm._name in _registered:
+        _registered.add(shm._name)
+    else:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _release(views, shm):
+    # views into the segment have to be released before it is closed
+    for view in views:
+        view.release()
+    shm.close()
+
+
+class SharedConfigStore:
+    """ Versioned key-value store in a shared memory segment.
+
+    Create it once with `SharedConfigStore.create`; other processes attach by
+    name or receive it pickled (e.g. as pool initializer argument).
+    """
+
+    def __init__(self, name: str, lock=None, _shm=None, _tracked: bool = False):
+        # `_tracked`: the segment is registered with the resource tracker of
+        # the pickling process, which processes started by multiprocessing share
+        if _shm is None:
+            _tracked = _tracked and multiprocessing.parent_process() is not None
+            _shm = _open(name, _tracked)
+        self._shm = _shm
+        self._tracked = _shm._name in _registered
+        # the process lock serializes writers of all processes
+        self._process_lock = lock
+        self._lock = lock if lock is not None else threading.Lock()
+        buf = self._shm.buf
+        header = buf[: 8 * _HEADER_WORDS].cast("Q")
+        magic = header[_MAGIC]
+        capacity, ring, key_space = header[_CAPACITY], header[_RING], header[_KEY_SPACE]
+        header.release()
+        if magic != MAGIC:
+            self._shm.close()
+            raise ValueError("Not a shared config store: '{}'.".format(name))
+
+        self._capacity = capacity
+        self._ring_size = ring
+        n_words = _HEADER_WORDS + _ENTRY_WORDS * capacity + ring
+        self._words = buf[: 8 * n_words].cast("Q")
+        self._entries = _HEADER_WORDS
+        self._ring = _HEADER_WORDS + _ENTRY_WORDS * capacity
+        self._key_space = buf[8 * n_words : 8 * n_words + key_space]
+        self._values = buf[8 * n_words + key_space :]
+        # keys of the entries known to this process
+        self._keys = []
+        self._slots = {}
+        self._keys_pos = 0
+        # detach when collected or on exit at the latest
+        self._finalizer = weakref.finalize(
+            self,
+            _release,
+            (self._words, self._key_space, self._values),
+            self._shm,
+        )
+
+    @classmethod
+    def create(
+        cls,
+        config: typing.Mapping = (),
+        name: str = None,
+        capacity: int = 4096,
+        value_space: int = 16 * 2 ** 20,
+        ring_size: int = 1024,
+        key_space: int = None,
+        lock=None,
+    ) -> "SharedConfigStore":
+        """ Create a new store, initialized with the values of `config`.
+
+        :param capacity: maximum number of keys.
+        :param value_space: bytes for pickled values.
+        :param ring_size: number of versions a process can fall behind and
+        still read only the changed keys.
+        :param key_space: bytes for the keys (default: 64 per key).
+        :param lock: `multiprocessing.Lock` shared by all writing processes.
+        """
+        if key_space is None:
+            key_space = 64 * capacity
+        key_space = (key_space + 7) // 8 * 8
+        n_words = _HEADER_WORDS + _ENTRY_WORDS * capacity + ring_size
+        size = 8 * n_words + key_space + value_space
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _registered.add(shm._name)
+        header = shm.buf[: 8 * _HEADER_WORDS].cast("Q")
+        header[_CAPACITY] = capacity
+        header[_RING] = ring_size
+        header[_KEY_SPACE] = key_space
+        header[_VALUE_SPACE] = value_space
+        header[_MAGIC] = MAGIC
+        header.release()
+        store = cls(shm.name, lock, _shm=shm)
+        if config:
+            store.write(config)
+        return store
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def version(self) -> int:
+        return self._words[_VERSION]
+
+    def __reduce__(self):
+        # other processes attach to the segment
+        return type(self), (self.name, self._process_lock, None, self._tracked)
+
+    def _sync_keys(self):
+        # read the keys added by other processes
+        words = self._words
+        n = words[_N_KEYS]
+        keys = self._keys
+        pos = self._keys_pos
+        key_space = self._key_space
+        while len(keys) < n:
+            (length,) = _KEY_LENGTH.unpack_from(key_space, pos)
+            pos += _KEY_LENGTH.size
+            key = sys.intern(bytes(key_space[pos : pos + length]).decode("utf-8"))
+            pos += length
+            self._slots[key] = len(keys)
+            keys.append(key)
+        self._keys_pos = pos
+
+    def _add_key(self, key: str) -> int:
+        words = self._words
+        slot = words[_N_KEYS]
+        encoded = key.encode("utf-8")
+        pos = words[_KEYS_END]
+        end = pos + _KEY_LENGTH.size + len(encoded)
+        if slot >= self._capacity or end > len(self._key_space):
+            raise ValueError("Shared config store is full (keys).")
+        _KEY_LENGTH.pack_into(self._key_space, pos, len(encoded))
+        self._key_space[pos + _KEY_LENGTH.size : end] = encoded
+        words[_KEYS_END] = end
+        # the key is published with the number of keys
+        words[_N_KEYS] = slot + 1
+        self._sync_keys()
+        return slot
+
+    def _publish(self, slot: int, value: typing.Optional[bytes]) -> int:
+        words = self._words
+        e = self._entries + _ENTRY_WORDS * slot
+        offset, allocated = words[e + 1], words[e + 3]
+        if value is not None and len(value) > allocated:
+            # does not fit: append, with room for slightly larger values
+            allocated = len(value) + len(value) // 4
+            offset = words[_VALUES_END]
+            if offset + allocated > len(self._values):
+                raise ValueError("Shared config store is full (values).")
+            words[_VALUES_END] = offset + allocated
+        version = words[_VERSION] + 1
+        words[e] = _BUSY
+        if value is None:
+            words[e + 2] = _DELETED
+        else:
+            self._values[offset : offset + len(value)] = value
+            words[e + 1] = offset
+            words[e + 2] = len(value)
+            words[e + 3] = allocated
+        words[e] = version
+        words[self._ring + version % self._ring_size] = slot
+        words[_VERSION] = version
+        return version
+
+    def write(self, updates: typing.Mapping) -> int:
+        """ Write values of keys.
+
+        :return: the new version.
+        :raises ValueError: if the store is full.
+        """
+        pickled = [
+            (k, pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL))
+            for k, v in updates.items()
+        ]
+        with self._lock:
+            self._sync_keys()
+            for key, value in pickled:
+                slot = self._slots.get(key)
+                if slot is None:
+                    slot = self._add_key(key)
+                self._publish(slot, value)
+            return self._words[_VERSION]
+
+    def delete(self, keys: typing.Iterable[str]) -> int:
+        """ Delete keys. Unknown keys are ignored.
+
+        :return: the new version.
+        """
+        with self._lock:
+            self._sync_keys()
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is not None:
+                    self._publish(slot, None)
+            return self._words[_VERSION]
+
+    def _read(self, slot: int) -> typing.Tuple[int, typing.Optional[bytes]]:
+        words = self._words
+        e = self._entries + _ENTRY_WORDS * slot
+        while True:
+            version = words[e]
+            if version == _BUSY:
+                continue
+            offset, length = words[e + 1], words[e + 2]
+            if length == _DELETED:
+                value = None
+            else:
+                value = bytes(self._values[offset : offset + length])
+            if words[e] == version:
+                return version, value
+
+    def changes_since(
+        self, version: int
+    ) -> typing.Tuple[int, dict, typing.List[str]]:
+        """ All changes after `version`.
+
+        :return: (current version, {key: new value}, deleted keys)
+        """
+        words = self._words
+        current = words[_VERSION]
+        if current == version:
+            return current, {}, []
+        # keys are published before the versions that refer to them
+        self._sync_keys()
+        slots = None
+        if current - version < self._ring_size:
+            ring, size = self._ring, self._ring_size
+            slots = {words[ring + v % size] for v in range(version + 1, current + 1)}
+            if words[_VERSION] + 1 - version >= size:
+                # the ring was overwritten while reading
+                slots = None
+        if slots is None:
+            entries = self._entries
+            slots = [
+                slot
+                for slot in range(len(self._keys))
+                if words[entries + _ENTRY_WORDS * slot] > version
+            ]
+
+        updates, deleted = {}, []
+        for slot in slots:
+            _, value = self._read(slot)
+            if value is None:
+                deleted.append(self._keys[slot])
+            else:
+                updates[self._keys[slot]] = pickle.loads(value)
+        return current, updates, deleted
+
+    def to_dict(self) -> dict:
+        return self.changes_since(0)[1]
+
+    def close(self):
+        """ Detach this process. The store lives on in other processes. """
+        self._finalizer()
+
+    def unlink(self):
+        """ Destroy the store (after `close`, in the creating process). """
+        self._shm.unlink()
+        _registered.discard(self._shm._name)
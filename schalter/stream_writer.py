@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Streaming YAML writer for large configurations.
+
+Entries are written one at a time. Scalars are formatted directly: strings as
+double-quoted (JSON escaped) YAML scalars, numbers, booleans and null in YAML 1.2
+core schema notation. Lists and mappings are written as JSON flow collections
+in flow style, everything else is passed to ruamel.yaml entry by entry. No
+representation of the whole configuration is built.
+"""
+
+import json
+import re
+import typing
+
+ORDERS = ("insertion", "sorted", "grouped")
+
+_PLAIN_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_./-]*$")
+# plain scalars that some YAML loaders do not read as strings
+_RESERVED = {"true", "false", "null", "yes", "no", "on", "off", "y", "n"}
+# characters to escape: not printable in YAML, line breaks in YAML 1.1 or tabs
+_UNSAFE = re.compile(
+    "[^\x20-\x7e\xa0-\u2027\u202a-\ud7ff\ue000-\ufefe\uff00-\ufffd"
+    "\U00010000-\U0010ffff]"
+)
+
+
+def _escape(match) -> str:
+    c = ord(match.group())
+    if c < 0x100:
+        return "\\x{:02x}".format(c)
+    if c < 0x10000:
+        return "\\u{:04x}".format(c)
+    return "\\U{:08x}".format(c)
+
+
+def _quoted(value: str) -> str:
+    # JSON escapes are valid in double-quoted YAML scalars. YAML escapes for
+    # the remaining characters that YAML does not allow unescaped.
+    return _UNSAFE.sub(_escape, json.dumps(value, ensure_ascii=False))
+
+
+def _scalar(value) -> typing.Optional[str]:
+    t = type(value)
+    if t is str:
+        return _quoted(value)
+    if t is bool:
+        return "true" if value else "false"
+    if t is int:
+        return str(value)
+    if t is float:
+        if value != value:
+            return ".nan"
+        if value in (float("inf"), float("-inf")):
+            return ".inf" if value > 0 else "-.inf"
+        return repr(value)
+    if value is None:
+        return "null"
+    return None
+
+
+def _key(key) -> typing.Optional[str]:
+    if (
+        type(key) is str
+        and _PLAIN_KEY.match(key) is not None
+        and key.lower() not in _RESERVED
+    ):
+        return key
+    return _scalar(key)
+
+
+def _flow(value) -> typing.Optional[str]:
+    if not isinstance(value, (list, tuple, dict)):
+        return None
+    try:
+        s = json.dumps(value, ensure_ascii=False, allow_nan=False)
+    except (TypeError, ValueError):
+        return None
+    return _UNSAFE.sub(_escape, s)
+
+
+def _ordered_keys(config: typing.Mapping, order: str) -> typing.Iterable:
+    if order == "insertion":
+        return list(config.keys())
+    if order == "sorted":
+        return sorted(config.keys(), key=str)
+    if order == "grouped":
+        # first path component, in order of first appearance.
+        # Keys without a path come first.
+        groups = {"": []}
+        for k in config.keys():
+            prefix = k.split("/", 1)[0] if isinstance(k, str) and "/" in k else ""
+            groups.setdefault(prefix, []).append(k)
+        return groups
+    raise ValueError("Unknown order '{}', use one of {}.".format(order, ORDERS))
+
+
+def write_yaml(
+    config: typing.Mapping,
+    stream: typing.TextIO,
+    order: str = "insertion",
+    flow_style: bool = False,
+) -> int:
+    """ Write `config` to a text stream as YAML mapping, entry by entry.
+
+    :param order: 'insertion', 'sorted' by key or 'grouped' by the first
+    component of the key path (with a comment line per group).
+    :param flow_style: write lists and mappings in compact flow style.
+    :return: number of written entries.
+    """
+    keys = _ordered_keys(config, order)
+    if isinstance(keys, dict):
+        groups = keys.items()
+    else:
+        groups = (("", keys),)
+
+    # ruamel dumpers for entries that are not formatted directly:
+    # block style, and flow style for collections
+    dumpers = {}
+    n = 0
+    write = stream.write
+    for prefix, group in groups:
+        if prefix:
+            write("# {}\n".format(json.dumps(prefix, ensure_ascii=False)[1:-1]))
+        for k in group:
+            try:
+                v = config[k]
+            except KeyError:
+                # deleted while writing
+                continue
+            key = _key(k)
+            value = _scalar(v)
+            if value is None and flow_style:
+                value = _flow(v)
+            if key is not None and value is not None:
+                write(key + ": " + value + "\n")
+            else:
+                # the entry itself stays a block mapping: only collections
+                # are written in flow style (a one-entry mapping of a scalar
+                # would be a flow mapping)
+                flow = flow_style and isinstance(v, (list, tuple, dict, set))
+                yaml = dumpers.get(flow)
+                if yaml is None:
+                    from ruamel.yaml import YAML
+
+                    yaml = YAML()
+                    # None: collections of scalars in flow style
+                    yaml.default_flow_style = None if flow else False
+                    dumpers[flow] = yaml
+                yaml.dump({k: v}, stream)
+            n += 1
+    return n
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Reload config files when they change on disk.
+
+The watcher polls the size and modification time of its files. Changed files
+are reloaded with `only_update=True`: only the keys whose values differ are
+written, so cached resolutions of all other keys stay valid.
+"""
+
+import os
+import threading
+import typing
+
+
+class ConfigWatcher:
+    """ Polls config files and reloads them into a `Schalter` configuration.
+
+    :param config: the `Schalter` instance to update.
+    :param paths: config files to watch.
+    :param interval: seconds between two polls of the background thread.
+    :param callback: called as callback(path, changes) after a reload with the
+    frozenset of changed keys. Not called if nothing changed.
+    """
+
+    def __init__(
+        self,
+        config,
+        paths: typing.Iterable,
+        interval: float = 1.0,
+        callback: typing.Callable[[typing.Any, typing.FrozenSet[str]], None] = None,
+    ):
+        self.config = config
+        self.interval = interval
+        self._callbacks = [callback] if callback is not None else []
+        # path -> (mtime_ns, size) of the last loaded version
+        self._stats = {p: self._stat(p) for p in paths}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _stat(path) -> typing.Optional[typing.Tuple[int, int]]:
+        try:
+            stat = os.stat(str(path))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def check(self) -> typing.Dict[typing.Any, typing.FrozenSet[str]]:
+        """ Reload all files that changed since the last check.
+
+        :return: {path: changed keys} of the reloaded files.
+        """
+        reloaded = {}
+        for path, last in self._stats.items():
+            stat = self._stat(path)
+            if stat is None or stat == last:
+                # a file that is being replaced is picked up on the next check
+                continue
+            changes = self.config.load_config_from_file(path, only_update=True)
+            self._stats[path] = stat
+            reloaded[path] = changes
+            if changes:
+                for callback in self._callbacks:
+                    callback(path, changes)
+        return reloaded
+
+    def _run(self):
+        from .schalter import logger
+
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # keep watching: the file may be fixed with the next write
+                logger.warning("Cannot reload config: {}".format(str(e)))
+
+    def start(self) -> "ConfigWatcher":
+        """ Start polling in a daemon thread. """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="schalter-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, exc_tb):
+        self.stop()
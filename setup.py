@@ -6,6 +6,8 @@ test_deps = [
 ]
 extras = {
     'test': test_deps,
+    # libyaml based YAML loader
+    'fast': ['ruamel.yaml.clib'],
 }
 
 setup(name='schalter',
@@ -18,13 +20,12 @@ setup(name='schalter',
       packages=['schalter'],
       zip_safe=False,
       install_requires=[
-          'decorator',
           'ruamel.yaml',
       ],
       setup_requires=['pytest-runner'],
       tests_require=test_deps,
       extras_require=extras,
-      python_requires='>=3.6',
+      python_requires='>=3.8',
       classifiers=[
           'Development Status :: 3 - Alpha',
           'Intended Audience :: Developers',
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+from schalter import Schalter
+from schalter.access_tracker import AccessTracker
+from schalter.key_table import KEYS
+
+
+def test_tracker():
+    tracker = AccessTracker()
+    tracker.mark("a")
+    tracker.mark_all(["b", "a", "c"])
+    assert "a" in tracker and "d" not in tracker
+    assert sorted(tracker.accessed()) == ["a", "b", "c"]
+    tracker.reset()
+    assert tracker.accessed() == []
+    tracker.mark("c")
+    assert tracker.accessed() == ["c"]
+
+
+def test_access_report_and_writer(tmp_path):
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_config("{a: 1, b: 2, x/c: 3, unused: 4}")
+
+    @Schalter.configure
+    def foo(*, a, d=5):
+        return a + d
+
+    @Schalter.scoped_configure
+    def bar(*, c):
+        return c
+
+    @Schalter.configure
+    def never_called(*, e=6):
+        return e
+
+    assert foo() == 6
+    with Schalter.Scope("x"):
+        assert bar() == 3
+    assert Schalter["b"] == 2
+    assert Schalter.get("missing/probe", 7) == 7
+    assert "missing/probe" not in KEYS.ids
+
+    report = config.access_report()
+    assert report["accessed"] == ["a", "b", "d", "x/c"]
+    assert report["unused"] == ["e", "unused"]
+
+    path = tmp_path / "accessed.yaml"
+    Schalter.write_config(path, only_accessed=True)
+    Schalter.clear()
+    Schalter.load_config_from_file_default(path)
+    assert Schalter.get_config().config == {"a": 1, "b": 2, "d": 5, "e": 6, "x/c": 3}
+
+
+def test_access_with_scope_fallback(tmp_path):
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_config("{a: 1, c: 2, unused: 3}")
+    config.set_scope_fallback()
+
+    @Schalter.configure
+    def foo(*, a):
+        return a
+
+    @Schalter.scoped_configure
+    def bar(*, c):
+        return c
+
+    assert foo() == 1
+    with Schalter.Scope("x"):
+        assert bar() == 2
+    assert config.access_report()["accessed"] == ["a", "c"]
+
+    path = tmp_path / "accessed.yaml"
+    Schalter.write_config(path, only_accessed=True)
+    Schalter.clear()
+    Schalter.load_config_from_file_default(path)
+    assert Schalter.get_config().config == {"a": 1, "c": 2}
+
+
+def test_reset_access_tracking():
+    Schalter.clear()
+    config = Schalter.get_config()
+
+    @Schalter.configure
+    def foo(*, a=1):
+        return a
+
+    foo()
+    assert config.access_report()["accessed"] == ["a"]
+    config.reset_access_tracking()
+    assert config.access_report()["accessed"] == []
+    foo()
+    assert config.access_report()["accessed"] == ["a"]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import asyncio
+
+from schalter import Schalter
+
+
+def test_aload_config_merge_order(tmp_path, monkeypatch):
+    monkeypatch.setenv(Schalter.DEFAULT_ENV_VAR_NAME, str(tmp_path))
+    for i in range(8):
+        (tmp_path / "layer{}.yaml".format(i)).write_text(
+            "shared: {0}\nkey{0}: {0}\n".format(i)
+        )
+    names = ["layer{}".format(i) for i in range(8)]
+
+    Schalter.clear()
+    for name in names:
+        Schalter.load_config(name)
+    sequential = dict(Schalter.get_config().config)
+
+    Schalter.clear()
+    config = Schalter.get_config()
+    changes = []
+    config.subscribe(changes.append)
+    loaded = asyncio.run(Schalter.aload_config(*names))
+    assert config.config == sequential
+    assert sequential["shared"] == 7
+    assert loaded == set(sequential)
+    # applied at once
+    assert len(changes) == 1
+    assert config.key_origin("shared").source == str(tmp_path / "layer7.yaml")
+    assert config.key_origin("key3") == (str(tmp_path / "layer3.yaml"), 2)
+
+
+def test_aload_config_from_file(tmp_path):
+    a = tmp_path / "a.yaml"
+    b = tmp_path / "b.json"
+    a.write_text("x: 1\ny: 1\n")
+    b.write_text('{"y": 2}')
+
+    async def load():
+        ticks = []
+
+        async def ticker():
+            # the loop keeps running while files are parsed
+            for _ in range(3):
+                ticks.append(1)
+                await asyncio.sleep(0)
+
+        changed, _ = await asyncio.gather(
+            config.aload_config_from_file(a, b), ticker()
+        )
+        return changed, ticks
+
+    Schalter.clear()
+    config = Schalter.get_config()
+    changed, ticks = asyncio.run(load())
+    assert changed == {"x", "y"}
+    assert config.config == {"x": 1, "y": 2}
+    assert ticks == [1, 1, 1]
+
+    b.write_text('{"y": 3}')
+    changed = asyncio.run(
+        Schalter.aload_config_from_file_default(a, b, only_update=True)
+    )
+    assert changed == {"y"}
+    assert Schalter["y"] == 3
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import pytest
+from schalter import Schalter
+from schalter import backends
+
+
+@pytest.mark.parametrize("ext", [".yaml", ".yml", ".json", ".pkl"])
+def test_round_trip(tmp_path, ext):
+    Schalter.clear()
+    Schalter["a/b"] = 1
+    Schalter["c"] = [1.5, "x"]
+    Schalter["d"] = {"e": None}
+    path = tmp_path / ("config" + ext)
+    Schalter.write_config(path)
+
+    Schalter.clear()
+    Schalter.load_config_from_file_default(path)
+    assert Schalter.get_config().config == {"a/b": 1, "c": [1.5, "x"], "d": {"e": None}}
+
+
+def test_unknown_extension_is_yaml(tmp_path):
+    Schalter.clear()
+    Schalter["a"] = 1
+    path = tmp_path / "config.cfg"
+    Schalter.write_config(path)
+    assert path.read_text().strip() == "a: 1"
+
+    Schalter.clear()
+    Schalter.load_config_from_file_default(path)
+    assert Schalter["a"] == 1
+
+
+def test_load_config_resolves_extensions(tmp_path, monkeypatch):
+    monkeypatch.setenv(Schalter.DEFAULT_ENV_VAR_NAME, str(tmp_path))
+    (tmp_path / "from_json.json").write_text('{"a": 1}')
+    (tmp_path / "from_yaml.yaml").write_text("a: 2")
+    (tmp_path / "both.yaml").write_text("a: 3")
+    (tmp_path / "both.json").write_text('{"a": 4}')
+
+    Schalter.clear()
+    Schalter.load_config("from_json")
+    assert Schalter["a"] == 1
+    Schalter.load_config("from_yaml")
+    assert Schalter["a"] == 2
+    # YAML is preferred
+    Schalter.load_config("both")
+    assert Schalter["a"] == 3
+    Schalter.load_config("both.json")
+    assert Schalter["a"] == 4
+
+    with pytest.raises(FileNotFoundError):
+        Schalter.load_config("missing")
+
+
+def test_pyyaml_loader_is_yaml_1_2():
+    try:
+        loads = backends._pyyaml_loads()
+    except ImportError:
+        pytest.skip("PyYAML with libyaml not available")
+    from ruamel.yaml import YAML
+
+    yaml = YAML(typ="safe", pure=True)
+    scalars = [
+        "010",
+        "0o17",
+        "0x1f",
+        "1_000",
+        "1e3",
+        "1.5e-3",
+        ".inf",
+        "-.INF",
+        "yes",
+        "on",
+        "No",
+        "TRUE",
+        "false",
+        "null",
+        "~",
+        "",
+        "1:30",
+        "+12",
+        "1.",
+        ".5",
+        "2001-12-14",
+        "abc",
+        "'1'",
+        "[1, 2]",
+        "{a: 1}",
+    ]
+    for s in scalars:
+        expected = yaml.load("a: " + s)["a"]
+        value = loads("a: " + s)["a"]
+        assert type(value) == type(expected) and value == expected, s
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from schalter import Schalter
+
+
+def test_snapshot_is_frozen():
+    Schalter.clear()
+
+    Schalter["a"] = 1
+    snapshot = Schalter.snapshot()
+    Schalter["a"] = 2
+    Schalter["b"] = 3
+
+    assert snapshot["a"] == 1
+    assert "b" not in snapshot
+    with pytest.raises(TypeError):
+        snapshot["a"] = 4
+
+    Schalter.get_config().set_copy_on_write()
+    snapshot = Schalter.snapshot()
+    Schalter["a"] = 5
+    assert snapshot["a"] == 2
+    assert Schalter["a"] == 5
+
+
+def test_copy_on_write_concurrent_readers():
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_copy_on_write()
+
+    # writers always keep both values identical
+    config.set_config("{x: 0, y: 0}")
+
+    @Schalter.configure
+    def foo(*, x, y):
+        return x, y
+
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            config.set_config("{{x: {0}, y: {0}}}".format(i))
+
+    def reader(_):
+        for _ in range(200):
+            snapshot = Schalter.snapshot()
+            assert snapshot["x"] == snapshot["y"]
+            x, y = foo()
+            assert x == y
+        return True
+
+    t = threading.Thread(target=writer)
+    t.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert all(executor.map(reader, range(16)))
+    finally:
+        stop.set()
+        t.join()
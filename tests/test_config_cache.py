@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from schalter import Schalter
+
+
+@pytest.fixture
+def config_loc(tmp_path, monkeypatch):
+    monkeypatch.setenv(Schalter.DEFAULT_ENV_VAR_NAME, str(tmp_path))
+    monkeypatch.delenv(Schalter.CACHE_ENV_VAR_NAME, raising=False)
+    Schalter.clear()
+    return tmp_path
+
+
+def test_cache_hit_and_miss(config_loc, caplog):
+    config_file = config_loc / "config.yaml"
+    config_file.write_text("a: 1\nb: [1, 2]\n")
+
+    Schalter.load_config("config")
+    assert "cache miss" in caplog.text
+    assert (config_loc / Schalter.CACHE_FOLDER_NAME).is_dir()
+    caplog.clear()
+
+    Schalter.clear()
+    Schalter.load_config("config")
+    assert "cache hit" in caplog.text
+    assert Schalter["a"] == 1 and Schalter["b"] == [1, 2]
+    caplog.clear()
+
+    # same size, different content and mtime
+    config_file.write_text("a: 2\nb: [1, 2]\n")
+    os.utime(str(config_file), ns=(0, 0))
+    Schalter.load_config("config")
+    assert "cache miss" in caplog.text
+    assert Schalter["a"] == 2
+    caplog.clear()
+
+    Schalter.load_config("config", use_cache=False)
+    assert "cache hit" not in caplog.text and "cache miss" not in caplog.text
+
+
+def test_cache_location_env_var(config_loc, tmp_path_factory, monkeypatch):
+    cache_loc = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv(Schalter.CACHE_ENV_VAR_NAME, str(cache_loc))
+    (config_loc / "config.json").write_text('{"a": 1}')
+
+    Schalter.load_config("config")
+    assert len(os.listdir(str(cache_loc))) == 1
+    assert not (config_loc / Schalter.CACHE_FOLDER_NAME).exists()
+
+
+def _load(_):
+    Schalter.clear()
+    Schalter.load_config("config")
+    return Schalter["a"]
+
+
+def test_concurrent_population(config_loc):
+    (config_loc / "config.yaml").write_text(
+        "".join("k{}: {}\n".format(i, i) for i in range(1000)) + "a: 1\n"
+    )
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(_load, range(8))) == [1] * 8
+
+    cache_files = os.listdir(str(config_loc / Schalter.CACHE_FOLDER_NAME))
+    assert len(cache_files) == 1 and cache_files[0].endswith(".pkl")
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from schalter import Schalter
+from schalter.frozen_store import FrozenConfigStore, freeze
+
+
+def test_frozen_store_mapping(tmp_path):
+    config = {"b/x": [1, 2], "a": None, "ä/ü": "unicode", "c": {"d": 1.5}}
+    path = tmp_path / "store.frozen"
+    freeze(config, path)
+
+    store = FrozenConfigStore(path)
+    assert len(store) == 4
+    assert dict(store) == config
+    assert sorted(store) == sorted(config)
+    assert "a" in store and "z" not in store and 1 not in store
+    assert store["ä/ü"] == "unicode"
+    with pytest.raises(KeyError):
+        _ = store["z"]
+
+    # pickling re-attaches to the file
+    assert dict(pickle.loads(pickle.dumps(store))) == config
+
+    freeze({}, path)
+    assert len(FrozenConfigStore(path)) == 0
+
+
+def test_attach_frozen_config(tmp_path):
+    Schalter.clear()
+    Schalter["a"] = 1
+    Schalter["p/b"] = 2
+    path = tmp_path / "store.frozen"
+    Schalter.freeze(path)
+
+    Schalter.clear()
+    Schalter["a"] = 0
+    Schalter["only_local"] = 3
+    Schalter.attach(path)
+    assert Schalter["a"] == 1
+    assert Schalter.get("p/b") == 2
+    assert Schalter["only_local"] == 3
+    assert Schalter.get("missing", 4) == 4
+    assert "p/b" in Schalter
+    assert len(Schalter.get_config().config) == 3
+
+    @Schalter.prefix("p")
+    @Schalter.configure
+    def foo(*, b):
+        return b
+
+    assert foo() == 2
+    # writes stay local and win over the store
+    Schalter["p/b"] = 5
+    assert foo() == 5
+    assert FrozenConfigStore(path)["p/b"] == 2
+
+    Schalter.get_config().set_copy_on_write()
+    Schalter["c"] = 6
+    snapshot = Schalter.snapshot()
+    Schalter["c"] = 7
+    assert snapshot["c"] == 6 and snapshot["a"] == 1
+
+
+def test_attach_on_layered_config(tmp_path):
+    path_a, path_b = tmp_path / "a.frozen", tmp_path / "b.frozen"
+    freeze({"a": 1, "shared": 1}, path_a)
+    freeze({"b": 2, "shared": 2}, path_b)
+
+    Schalter.clear()
+    Schalter.attach(path_a)
+    Schalter["c"] = 3
+    # deleted keys of the previous base stay deleted
+    Schalter.get_config()._delete(["a"])
+    Schalter.attach(path_b)
+    assert Schalter.get_config().config == {"b": 2, "shared": 2, "c": 3}
+
+    Schalter.clear()
+    path = tmp_path / "config.yaml"
+    path.write_text("x: 1\ny: 2\n")
+    Schalter.load_config_from_file_default(path, lazy=True)
+    Schalter.attach(path_b)
+    assert Schalter.get_config().config == {"x": 1, "y": 2, "b": 2, "shared": 2}
+
+
+def _worker(path):
+    Schalter.clear()
+    Schalter.attach(path)
+
+    @Schalter.configure
+    def foo(*, a, b):
+        return a + b
+
+    return foo(), Schalter["a"]
+
+
+def test_attach_in_spawned_workers(tmp_path):
+    Schalter.clear()
+    Schalter["a"] = 1
+    Schalter["b"] = 2
+    path = tmp_path / "store.frozen"
+    Schalter.freeze(path)
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+        assert list(executor.map(_worker, [path] * 4)) == [(3, 1)] * 4
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import os
+import pathlib
+import subprocess
+import sys
+
+# cumulative import time of 'schalter' in microseconds (bytecode cached)
+IMPORT_TIME_BUDGET_US = 50000
+
+# heavy modules that may only be imported on first use
+LAZY_MODULES = ["ruamel.yaml", "logging", "pathlib", "inspect"]
+
+
+def _run_python(*args):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run(
+        [sys.executable, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=str(pathlib.Path(__file__).parents[1]),
+        check=True,
+    )
+
+
+def test_lazy_imports():
+    out = _run_python(
+        "-c", "import sys, schalter; print(' '.join(sorted(sys.modules)))"
+    )
+    imported = set(out.stdout.decode().split())
+    assert "schalter" in imported
+    assert not imported.intersection(LAZY_MODULES)
+
+
+def test_annotations_resolve():
+    out = _run_python(
+        "-c",
+        "import typing, schalter; "
+        "hints = typing.get_type_hints(schalter.Schalter.load_config_from_file); "
+        "print(hints['path_config'].__name__)",
+    )
+    assert out.stdout.decode().split() == ["Path"]
+
+
+def test_import_time_budget():
+    # first run writes the bytecode cache
+    _run_python("-c", "import schalter")
+
+    def cumulative_us():
+        out = _run_python("-X", "importtime", "-c", "import schalter")
+        for line in out.stderr.decode().splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == "schalter":
+                return int(fields[1])
+        raise RuntimeError("No import time reported for 'schalter'.")
+
+    assert min(cumulative_us() for _ in range(3)) < IMPORT_TIME_BUDGET_US
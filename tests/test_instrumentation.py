@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+from schalter import Schalter
+from schalter.instrumentation import CallHook
+
+
+def test_call_stats():
+    Schalter.clear()
+    config = Schalter.get_config()
+
+    @Schalter.configure
+    def foo(*, a=1, b=2):
+        return a + b
+
+    @Schalter.scoped_configure
+    def bar(*, c):
+        return c
+
+    Schalter["x/c"] = 3
+    assert foo() == 3
+    assert Schalter.stats()["functions"] == {}
+
+    config.set_instrumentation()
+    assert foo() == 3
+    assert foo() == 3
+    with Schalter.Scope("x"):
+        assert bar() == 3
+
+    stats = Schalter.stats(reset=True)
+    name = foo.__module__ + "." + foo.__qualname__
+    assert stats["functions"][name]["calls"] == 2
+    assert stats["functions"][name]["misses"] == 0
+    assert stats["functions"][name]["resolve_seconds"] >= 0.0
+    assert stats["keys"] == {"a": 2, "b": 2, "x/c": 1}
+    assert stats["scopes"] == {"": 2, "x": 1}
+    assert Schalter.stats()["keys"] == {}
+
+    # functions configured while instrumentation is on are instrumented
+    @Schalter.configure
+    def baz(*, d=4):
+        return d
+
+    baz(d=5)
+    assert Schalter.stats()["keys"] == {"d": 1}
+
+    config.set_instrumentation(False)
+    foo()
+    assert Schalter.stats()["functions"] == {}
+
+
+def test_custom_hook():
+    Schalter.clear()
+    config = Schalter.get_config()
+    calls = []
+
+    class Hook(CallHook):
+        def on_call(self, function, scope, keys, missed, resolve_seconds, seconds):
+            calls.append((function.__name__, keys, missed))
+
+    @Schalter.configure
+    def foo(*, a=1):
+        return a
+
+    hook = Hook()
+    config.add_hook(hook)
+    foo()
+    foo()
+    Schalter["a"] = 2
+    assert foo() == 2
+    config.remove_hook(hook)
+    foo()
+    assert calls == [
+        ("foo", ("a",), True),
+        ("foo", ("a",), False),
+        ("foo", ("a",), True),
+    ]
+
+
+def test_call_stats_scope_fallback():
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_scope_fallback()
+    config.set_instrumentation()
+
+    @Schalter.scoped_configure
+    def foo(*, a, b=2):
+        return a + b
+
+    Schalter["x/a"] = 1
+    Schalter["b"] = 3
+    with Schalter.Scope("x"):
+        with Schalter.Scope("y"):
+            assert foo() == 4
+            assert foo() == 4
+
+    # hits count for the keys that were found, not the ones of the scope
+    assert Schalter.stats()["keys"] == {"x/a": 2, "b": 2}
+    config.set_scope_fallback(False)
+    config.set_instrumentation(False)
+
+
+def test_instrumentation_disabled_during_call():
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_instrumentation()
+
+    @Schalter.configure
+    def foo(*, a=1):
+        # as if another thread turned instrumentation off during the call
+        config.set_instrumentation(False)
+        return a
+
+    assert foo() == 1
+    assert foo() == 1
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import pytest
+from schalter import Schalter
+from schalter.key_index import KeyTrie
+
+
+def test_key_trie():
+    trie = KeyTrie(["a/b", "a/b/c", "a/bc", "/x", "d", 1])
+    assert len(trie) == 5
+    assert sorted(trie.subtree("")) == ["/x", "a/b", "a/b/c", "a/bc", "d"]
+    assert sorted(trie.subtree("a/b")) == ["a/b", "a/b/c"]
+    assert sorted(trie.subtree("a")) == ["a/b", "a/b/c", "a/bc"]
+    assert list(trie.subtree("a/x")) == []
+    assert "a/b" in trie and "a" not in trie and 1 not in trie
+
+    trie.remove("a/b/c")
+    trie.remove("/x")
+    assert sorted(trie.subtree("")) == ["a/b", "a/bc", "d"]
+    with pytest.raises(KeyError):
+        trie.remove("a")
+    trie.add("a")
+    assert sorted(trie.subtree("a")) == ["a", "a/b", "a/bc"]
+
+
+def test_subtree_api():
+    Schalter.clear()
+    Schalter.get_config().set_config(
+        "{model/encoder/layers: 4, model/encoder/width: 8, model/decoder/layers: 2}"
+    )
+    # index is built now and maintained from here on
+    assert Schalter.subtree("model/encoder") == {"layers": 4, "width": 8}
+
+    Schalter["model/encoder/dropout"] = 0.1
+    Schalter["model/encoder2/x"] = 0
+
+    @Schalter.prefix("model/encoder")
+    @Schalter.configure
+    def encoder(*, layers, width):
+        return layers, width
+
+    assert encoder() == (4, 8)
+
+    c = Schalter.get_config()
+    assert sorted(c.subtree_keys("model/encoder")) == [
+        "model/encoder/dropout",
+        "model/encoder/layers",
+        "model/encoder/width",
+    ]
+    assert dict(c.iter_subtree("model/decoder")) == {"model/decoder/layers": 2}
+
+    assert c.delete_subtree("model/encoder") == 3
+    assert "model/encoder/layers" not in Schalter
+    assert Schalter["model/encoder2/x"] == 0
+    assert Schalter.subtree("model") == {"decoder/layers": 2, "encoder2/x": 0}
+    with pytest.raises(KeyError):
+        encoder()
+    assert c.delete_subtree("model/encoder") == 0
+
+
+def test_subtree_on_frozen_store(tmp_path):
+    Schalter.clear()
+    Schalter["a/x"] = 1
+    Schalter["a/y"] = 2
+    Schalter.freeze(tmp_path / "store.frozen")
+
+    Schalter.clear()
+    Schalter.attach(tmp_path / "store.frozen")
+    c = Schalter.get_config()
+    c.set_copy_on_write()
+    Schalter["a/z"] = 3
+    assert Schalter.subtree("a") == {"x": 1, "y": 2, "z": 3}
+    assert c.delete_subtree("a") == 3
+    assert Schalter.subtree("a") == {}
+    assert "a/x" not in Schalter and len(c.config) == 0
+    Schalter["a/x"] = 4
+    assert Schalter.subtree("a") == {"x": 4}
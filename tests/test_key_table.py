@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import pytest
+from schalter import Schalter
+from schalter.call_plan import CallPlan
+from schalter.key_table import KEYS, ConfigStore, KeyTable
+
+
+def test_key_table():
+    table = KeyTable()
+    key = "".join(["a", "/", "b"])
+    i = table.intern(key)
+    assert table.intern("a/b") == i
+    assert table.intern_all(["x", "a/b"]) == (i + 1, i)
+    assert table.keys[i] is table.keys[table.intern(key)]
+    assert len(table) == 2
+
+
+def test_config_store():
+    store = ConfigStore({"a": 1, "b/c": 2})
+    assert store["a"] == 1 and len(store) == 2
+    assert "b/c" in store and "never-used-key" not in store
+    with pytest.raises(KeyError):
+        store["never-used-key"]
+
+    copy = store.copy()
+    store["a"] = 3
+    del store["b/c"]
+    assert copy == {"a": 1, "b/c": 2}
+    assert store == {"a": 3}
+    assert list(store) == ["a"]
+    with pytest.raises(KeyError):
+        del store["b/c"]
+
+    ids = KEYS.intern_all(["a", "b/c"])
+    assert copy.lookup_ids(ids) == [1, 2]
+    with pytest.raises(KeyError):
+        store.lookup_ids(ids)
+
+
+def test_config_store_spans_own_keys():
+    KEYS.intern_all("unrelated/{}".format(i) for i in range(1000))
+    first = KEYS.intern("spans/a")
+    KEYS.intern_all("unrelated/more/{}".format(i) for i in range(1000))
+    store = ConfigStore({"spans/b": 2})
+    store["spans/a"] = 1
+    assert len(store._values) == KEYS.ids["spans/b"] - first + 1
+    assert store == {"spans/a": 1, "spans/b": 2}
+    assert store.lookup_ids([first]) == [1]
+    assert "unrelated/3" not in store
+    copy = store.copy()
+    del store["spans/a"]
+    assert list(store) == ["spans/b"] and copy["spans/a"] == 1
+
+
+def test_plan_keys_are_interned_once():
+    plan = CallPlan({"x": ("x", None, True), "y": ("y", None, False)})
+    keys = plan.keys("s1/s2")
+    assert keys == ("s1/s2/x", "y")
+    assert plan.keys("s1/s2") is keys
+    assert plan.key_ids("s1/s2") == KEYS.intern_all(keys)
+    assert plan.resolve(ConfigStore({"s1/s2/x": 1, "y": 2}), "s1/s2") == {
+        "x": 1,
+        "y": 2,
+    }
+
+
+@pytest.mark.parametrize("copy_on_write", [False, True])
+def test_compact_configuration(copy_on_write):
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_config("{a: 1, s/b: 2}")
+    config.set_compact_store()
+    if copy_on_write:
+        config.set_copy_on_write()
+
+    @Schalter.configure
+    def foo(*, a, c=3):
+        return a + c
+
+    @Schalter.scoped_configure
+    def bar(*, b):
+        return b
+
+    assert foo() == 4
+    with Schalter.Scope("s"):
+        assert bar() == 2
+        assert bar(b=5) == 5
+    snapshot = Schalter.snapshot()
+    Schalter["a"] = 2
+    assert foo() == 5
+    assert snapshot["a"] == 1
+    assert config.subtree_keys("s") == ["s/b"]
+    assert config.config == {"a": 2, "c": 3, "s/b": 5}
+
+    config.set_compact_store(False)
+    assert type(config.config) is dict
+    assert foo() == 5
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import pickle
+
+import pytest
+from ruamel.yaml import YAML
+from schalter import Schalter
+from schalter.lazy_yaml import LazyYamlFile, index_yaml
+
+CONFIG_TEXT = """\
+---
+# comment
+a: 1
+"quoted: key": x
+'single ''q''': [1, 2]
+b/c:
+  nested: {d: 2}
+  list:
+  - 1
+  - 2
+items:
+- 1
+- [2, 3]
+text: |
+  line 1
+
+  line 2
+# comment between entries
+"1": string key
+1: int key
+2.5: float key
+multi: word
+  continued
+empty:
+"""
+
+
+def test_lazy_yaml_file(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text(CONFIG_TEXT)
+    expected = YAML(typ="safe").load(CONFIG_TEXT)
+
+    lazy = LazyYamlFile.open(path)
+    assert lazy is not None
+    assert list(lazy) == list(expected)
+    assert len(lazy) == len(expected)
+    assert "a" in lazy and "z" not in lazy
+    # nothing is parsed before the first access
+    assert not lazy._values
+    assert lazy["b/c"] == expected["b/c"]
+    assert list(lazy._values) == ["b/c"]
+    assert dict(lazy) == expected
+    with pytest.raises(KeyError):
+        _ = lazy["z"]
+    # pickling indexes the file again
+    assert dict(pickle.loads(pickle.dumps(lazy))) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "a: &x 1\nb: *x\n",
+        "a: 1\n---\nb: 2\n",
+        "? complex\n: 1\n",
+        "{a: 1, b: 2}\n",
+        "- 1\n- 2\n",
+        "---\n- 1\n",
+        "--- {a: 1}\n",
+        "%YAML 1.2\n---\na: 1\n",
+        "a: {x: 1,\ny: 2}\n",
+        "a: [1,\ny: 2]\n",
+        'a: "x\ny: 2"\n',
+        "a: 'x\ny: 2'\n",
+        "a: x\nb: 'it''s\nc: 1'\n",
+    ],
+)
+def test_not_indexed(text):
+    assert index_yaml(text.encode()) is None
+
+
+def test_load_config_lazy(tmp_path):
+    Schalter.clear()
+    Schalter["a"] = 0
+    Schalter["local"] = "kept"
+    path = tmp_path / "config.yaml"
+    path.write_text(CONFIG_TEXT)
+
+    changes = Schalter.load_config_from_file_default(path, lazy=True)
+    assert "a" in changes and "text" in changes
+    config = Schalter.get_config().config
+    lazy = config.base.maps[0]
+    assert not lazy._values
+
+    assert Schalter["a"] == 1
+    assert Schalter["local"] == "kept"
+    assert Schalter.get("text") == "line 1\n\nline 2\n"
+    assert Schalter.get("missing", 3) == 3
+    assert "b/c" in Schalter
+
+    @Schalter.prefix("b")
+    @Schalter.configure
+    def foo(*, c):
+        return c["nested"]["d"]
+
+    assert foo() == 2
+    assert sorted(lazy._values) == ["a", "b/c", "text"]
+
+    # writes win over the file
+    Schalter["a"] = 5
+    assert Schalter["a"] == 5
+    assert len(config) == len(lazy) + 1
+
+    with pytest.raises(ValueError):
+        Schalter.load_config_from_file_default(path, only_update=True, lazy=True)
+
+
+def test_load_config_lazy_fallback(tmp_path):
+    Schalter.clear()
+    path = tmp_path / "config.yaml"
+    path.write_text("a: &x 1\nb: *x\n")
+    assert Schalter.load_config_from_file_default(path, lazy=True) == {"a", "b"}
+    assert type(Schalter.get_config().config) is dict
+    assert Schalter["b"] == 1
+
+    path = tmp_path / "config.json"
+    path.write_text('{"c": 2}')
+    Schalter.load_config_from_file_default(path, lazy=True)
+    assert Schalter["c"] == 2
+
+
+def test_load_config_lazy_file_rewritten(tmp_path):
+    Schalter.clear()
+    path = tmp_path / "config.yaml"
+    path.write_text("".join("k{0}: {0}\n".format(i) for i in range(5000)))
+    Schalter.load_config_from_file_default(path, lazy=True)
+    # rewritten in place while attached: the loaded content is kept
+    path.write_text("k0: -1\n")
+    assert Schalter["k0"] == 0
+    assert Schalter["k4999"] == 4999
+    lazy = Schalter.get_config().config.base
+    assert pickle.loads(pickle.dumps(lazy))["k4999"] == 4999
+
+
+def test_lazy_yaml_file_special_cases(tmp_path):
+    path = tmp_path / "config.yaml"
+    text = "a: {x: 1, y: '}'} # {\nb: don't\n# 'c: 1\nd: \"e\"\n"
+    path.write_bytes(b"\xef\xbb\xbf" + text.encode())
+    lazy = LazyYamlFile.open(path)
+    assert lazy is not None
+    assert dict(lazy) == YAML(typ="safe").load(text)
+    assert lazy._index["a"][0] == 3
+
+
+def test_load_config_lazy_continued_entries(tmp_path):
+    Schalter.clear()
+    path = tmp_path / "config.yaml"
+    # continued at column 0: loaded eagerly
+    path.write_text("a: {x: 1,\ny: 2}\nb: 'x\nc: 1'\n")
+    assert Schalter.load_config_from_file_default(path, lazy=True) == {"a", "b"}
+    assert Schalter["a"] == {"x": 1, "y": 2}
+    assert Schalter["b"] == "x c: 1"
+
+    path.write_bytes(b"\xef\xbb\xbfa: 1\n")
+    Schalter.load_config_from_file_default(path, lazy=True)
+    assert Schalter["a"] == 1
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from schalter import Schalter, backends
+
+
+def write_stack(folder):
+    (folder / "base.yaml").write_text(
+        "model: {layers: 4, act: relu, opt: {lr: 0.1, wd: 0.01}}\nbatch: 32\n"
+    )
+    (folder / "hardware.json").write_text('{"batch": 64, "gpus": 2}')
+    (folder / "sweep.yaml").write_text("model: {opt: {lr: 0.2}}\n")
+    return ["base", "hardware", "sweep"]
+
+
+def test_load_configs_shallow_and_deep(tmp_path, monkeypatch):
+    monkeypatch.setenv(Schalter.DEFAULT_ENV_VAR_NAME, str(tmp_path))
+    names = write_stack(tmp_path)
+
+    Schalter.clear()
+    for name in names:
+        Schalter.load_config(name)
+    sequential = dict(Schalter.get_config().config)
+
+    Schalter.clear()
+    assert Schalter.load_configs(names) == {"model", "batch", "gpus"}
+    assert Schalter.get_config().config == sequential
+    assert Schalter["model"] == {"opt": {"lr": 0.2}}
+    # the last file with a key is its origin
+    assert Schalter.origin("model") == (str(tmp_path / "sweep.yaml"), 1)
+    assert Schalter.origin("batch") == (str(tmp_path / "hardware.json"), 1)
+
+    Schalter.clear()
+    Schalter.load_configs(names, deep_merge=True)
+    assert Schalter["model"] == {
+        "layers": 4,
+        "act": "relu",
+        "opt": {"lr": 0.2, "wd": 0.01},
+    }
+    assert Schalter["batch"] == 64
+
+    # deep merge with the current configuration
+    (tmp_path / "act.yaml").write_text("model: {act: gelu}\n")
+    Schalter.load_configs(["act"], deep_merge=True)
+    assert Schalter["model"]["act"] == "gelu"
+    assert Schalter["model"]["layers"] == 4
+
+
+def test_load_config_files_in_processes(tmp_path):
+    names = write_stack(tmp_path)
+    paths = [next(tmp_path.glob(name + ".*")) for name in names]
+
+    Schalter.clear()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=context) as pool:
+        Schalter.get_config().load_config_files(paths, deep_merge=True, executor=pool)
+    assert Schalter["model"]["opt"] == {"lr": 0.2, "wd": 0.01}
+    assert Schalter["gpus"] == 2
+
+
+def test_load_config_files_ruamel_loader(tmp_path, monkeypatch):
+    # ruamel's loader is used without PyYAML or with ruamel.yaml.clib
+    monkeypatch.setattr(backends.yaml_backend, "_loads", backends._ruamel_loads())
+    paths = []
+    for i in range(16):
+        path = tmp_path / "layer_{}.yaml".format(i)
+        path.write_text(
+            "".join("l{0}/k{1}: {{v: [{1}, x]}}\n".format(i, k) for k in range(300))
+        )
+        paths.append(path)
+
+    Schalter.clear()
+    for _ in range(3):
+        Schalter.get_config().load_config_files(paths)
+    assert len(Schalter.get_config().config) == 16 * 300
+    assert Schalter["l15/k299"] == {"v": [299, "x"]}
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from schalter import Schalter
+
+
+@Schalter.scoped_configure
+def scoped_value(*, value=1):
+    return value
+
+
+@Schalter.configure
+def configured_lr(*, lr):
+    return lr
+
+
+def initialize_before_import(blob):
+    # unpickling this initializer imports this module (and configures
+    # `configured_lr`) before the state is imported
+    Schalter.import_state(blob)
+
+
+def call_configured_lr(_):
+    return configured_lr(), Schalter.get("lr")
+
+
+def worker_state(_):
+    return (
+        dict(Schalter.get_config().config),
+        Schalter._scope.fullname,
+        scoped_value(),
+        Schalter.get_config("other").config["b"],
+    )
+
+
+def test_export_import_state(tmp_path):
+    Schalter.clear()
+    Schalter["a"] = 1
+    Schalter.get_config("other").set_manual("b", 2)
+    Schalter.get_config().set_compact_store()
+    blob = Schalter.export_state()
+
+    Schalter.clear()
+    Schalter.import_state(blob)
+    assert Schalter.get_config().config == {"a": 1}
+    assert Schalter.get_config("other").config == {"b": 2}
+
+    # a frozen store is shipped by path
+    path = tmp_path / "store.frozen"
+    Schalter.freeze(path)
+    Schalter.attach(path)
+    Schalter["c"] = 3
+    blob = Schalter.export_state()
+    assert len(blob) < 500
+    Schalter.clear()
+    Schalter.import_state(blob)
+    assert Schalter.get_config().config == {"a": 1, "c": 3}
+
+
+def test_spawned_pool_workers():
+    Schalter.clear()
+    Schalter.get_config().set_default("value", 1)
+    Schalter["s/value"] = 5
+    Schalter["unscoped"] = [1, 2]
+    Schalter.get_config("other").set_manual("b", 2)
+
+    context = multiprocessing.get_context("spawn")
+    with Schalter.Scope("s"):
+        kwargs = Schalter.pool_kwargs()
+    with ProcessPoolExecutor(max_workers=2, mp_context=context, **kwargs) as pool:
+        results = list(pool.map(worker_state, range(4)))
+
+    for config, scope, value, b in results:
+        assert config == Schalter.get_config().config
+        assert scope == "s"
+        assert value == 5
+        assert b == 2
+
+
+def test_functions_configured_before_import():
+    Schalter.clear()
+
+    @Schalter.configure
+    def foo(*, x=1):
+        return x
+
+    Schalter["x"] = 2
+    Schalter["y"] = 3
+    blob = Schalter.export_state()
+    Schalter["x"] = 5
+    Schalter["z"] = 6
+    # filled in place: configured functions see the imported values
+    Schalter.import_state(blob)
+    assert foo() == 2
+    assert Schalter.get_config().config == {"x": 2, "y": 3}
+    assert Schalter.origin("y").source == "<imported>"
+
+    Schalter["lr"] = 0.1
+    kwargs = Schalter.pool_kwargs()
+    kwargs["initializer"] = initialize_before_import
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, **kwargs) as pool:
+        assert list(pool.map(call_configured_lr, range(2))) == [(0.1, 0.1)] * 2
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import os
+
+import pytest
+from schalter import Schalter
+from schalter.frozen_store import freeze
+from schalter.provenance import Origin, ProvenanceStore
+
+
+def test_origin(tmp_path):
+    Schalter.clear()
+    config = Schalter.get_config()
+    path = tmp_path / "config.yaml"
+    path.write_text("# header\na: 1\nb:\n  c: 2\nd: 3\n")
+    config.load_config_from_file(path)
+    config.set_config("{d: 4}")
+    Schalter["e"] = 5
+
+    @Schalter.configure
+    def foo(*, f=6):
+        return f
+
+    assert Schalter.origin("a") == Origin(str(path), 2)
+    assert Schalter.origin("b") == (str(path), 3)
+    assert Schalter.origin("d") == ("<str>", None)
+    assert Schalter.origin("e") == ("<manual>", None)
+    assert Schalter.origin("f") == ("<default>", None)
+    assert Schalter.origin("missing") is None
+
+    # lines are not reported for files that changed since they were loaded
+    path.write_text("a: 1\n")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert Schalter.origin("a") == (str(path), None)
+
+    config.delete_subtree("b")
+    assert Schalter.origin("b") is None
+
+
+def test_origin_lazy(tmp_path):
+    Schalter.clear()
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\nb:\n- 1\n- 2\nc: 3\n")
+    Schalter.load_config_from_file_default(path, lazy=True)
+    assert Schalter.origin("c") == (str(path), 5)
+    assert not Schalter.get_config().config.base._values
+
+
+def test_history_bounded(tmp_path):
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_history_depth(3)
+    path = tmp_path / "config.yaml"
+    for i in range(10):
+        path.write_text("a: {}\n".format(i))
+        config.load_config_from_file(path, only_update=True)
+        Schalter["a"] = -i
+    assert Schalter.history("a") == [
+        ("<manual>", None),
+        (str(path), 1),
+        ("<manual>", None),
+    ]
+    # one source per file, however often it is reloaded
+    assert config._provenance.sources() == [str(path), "<manual>"]
+
+    config.set_history_depth(1)
+    assert Schalter.history("a") == [("<manual>", None)]
+    with pytest.raises(ValueError):
+        ProvenanceStore(history_depth=0)
+
+
+def test_origin_of_bases(tmp_path):
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_history_depth(2)
+    Schalter["a"] = 0
+    path = tmp_path / "store.frozen"
+    freeze({"a": 1, "b": 2}, path)
+    Schalter.attach(path)
+    # the store is recorded as a whole
+    assert not config._provenance._origins
+    assert Schalter.origin("a") == (str(path), None)
+    assert Schalter.history("a") == [(str(path), None), ("<manual>", None)]
+
+    Schalter["b"] = 3
+    assert Schalter.history("b") == [("<manual>", None), (str(path), None)]
+    config._delete(["a"])
+    assert Schalter.origin("a") is None
+
+
+def test_line_index_cached(tmp_path):
+    Schalter.clear()
+    path = tmp_path / "config.json"
+    path.write_text('{\n  "a": 1,\n  "b": {"c": 2},\n  "d": 3\n}\n')
+    Schalter.load_config_from_file_default(path)
+    assert Schalter.origin("d") == (str(path), 4)
+    source = Schalter.get_config()._provenance._sources[0]
+    lines = source.lines
+    assert Schalter.origin("b") == (str(path), 3)
+    assert source.lines is lines
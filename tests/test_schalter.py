@@ -3,6 +3,8 @@
 __author__ = """Christoph Rist"""
 __email__ = "c.rist@posteo.de"
 
+import inspect
+
 import pytest
 from schalter import Schalter
 
@@ -321,3 +323,93 @@ def test_broad_and_narrow_configures():
 
     assert foo() == 3
     assert bar() == (2, 1)
+
+
+def test_call_plan_rebuilt_on_mapping_change():
+    Schalter.clear()
+
+    Schalter["x"] = 1
+    Schalter["p/x"] = 2
+    Schalter["y"] = 3
+
+    @Schalter.configure(a="x")
+    def foo(*, a, b):
+        return a + b
+
+    assert foo(b=0) == 1
+    foo = Schalter.configure(b="y")(Schalter.prefix("p")(foo))
+    assert foo() == 2 + 3
+    Schalter["p/x"] = 5
+    assert foo() == 5 + 3
+    assert foo(a=1) == 1 + 3
+    assert Schalter["p/x"] == 1
+
+
+def test_signature_preserved():
+    Schalter.clear()
+
+    @Schalter.configure("b")
+    @Schalter.configure(a="x")
+    def foo(pos, *, a, b: int = 2, c=3):
+        """Docstring."""
+        return pos, a, b, c
+
+    assert foo.__name__ == "foo"
+    assert foo.__doc__ == "Docstring."
+    parameters = inspect.signature(foo).parameters
+    assert list(parameters) == ["pos", "a", "b", "c"]
+    assert parameters["b"].annotation is int
+    assert parameters["c"].default == 3
+
+    Schalter["x"] = 1
+    assert foo(0) == (0, 1, 2, 3)
+    assert foo(0, c=4) == (0, 1, 2, 4)
+
+
+def test_bind():
+    Schalter.clear()
+
+    @Schalter.configure
+    def foo(x, *, a=1, b=2):
+        return x + a + b
+
+    @Schalter.scoped_configure
+    def bar(*, c):
+        return c
+
+    fast = Schalter.bind(foo)
+    assert fast.__name__ == "foo"
+    assert [fast(i) for i in range(3)] == [3, 4, 5]
+
+    Schalter["a"] = 10
+    assert fast(0) == 12
+    assert fast(0, b=0) == 10
+    assert Schalter["b"] == 0
+
+    Schalter["s/c"] = 4
+    with Schalter.Scope("s"):
+        fast_bar = Schalter.bind(bar)
+    # the scope is fixed when binding
+    assert fast_bar() == 4
+    with pytest.raises(KeyError):
+        Schalter.bind(bar)
+    with pytest.raises(ValueError):
+        Schalter.bind(lambda: None)
+
+
+def test_bind_follows_mapping():
+    Schalter.clear()
+
+    @Schalter.configure("b")
+    def foo(*, a, b):
+        return a + b
+
+    Schalter["a"] = 1
+    Schalter["b"] = 2
+    fast = Schalter.bind(foo)
+    with pytest.raises(TypeError):
+        fast()
+    # re-decorated in place: the bound function uses the new mapping
+    assert Schalter.configure("a")(foo) is foo
+    assert foo() == 3
+    assert fast() == 3
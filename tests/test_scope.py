@@ -3,6 +3,10 @@
 __author__ = """Christoph Rist"""
 __email__ = "c.rist@posteo.de"
 
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from schalter import Schalter
 
@@ -40,3 +44,176 @@ def test_scoped_function():
     @Schalter.Scope("B")
     def do_stuff_b():
         foo(a=3)
+
+
+def test_scoped_resolution_cache_invalidation():
+    Schalter.clear()
+
+    @Schalter.scoped_configure
+    def foo(*, a):
+        return a
+
+    Schalter["A/a"] = 1
+    Schalter["B/a"] = 2
+
+    with Schalter.Scope("A"):
+        assert foo() == 1
+        assert foo() == 1
+        Schalter["A/a"] = 3
+        assert foo() == 3
+        Schalter.get_config().set_config("{A/a: 4}")
+        assert foo() == 4
+        assert foo(a=5) == 5
+        assert foo() == 5
+
+    with Schalter.Scope("B"):
+        assert foo() == 2
+
+    with Schalter.Scope("C"):
+        with pytest.raises(KeyError):
+            foo()
+
+
+def test_scope_isolation_asyncio():
+    Schalter.clear()
+
+    @Schalter.scoped_configure
+    def foo(*, a):
+        return a
+
+    n = 2000
+    for i in range(n):
+        Schalter["task{}/inner/a".format(i)] = i
+
+    async def task(i):
+        with Schalter.Scope("task{}".format(i)):
+            await asyncio.sleep(0)
+            with Schalter.Scope("inner") as config_scope:
+                await asyncio.sleep(0)
+                assert config_scope.fullname == "task{}/inner".format(i)
+                assert foo() == i
+            await asyncio.sleep(0)
+            assert Schalter._scope.fullname == "task{}".format(i)
+        return foo.__name__
+
+    async def run_all():
+        return await asyncio.gather(*(task(i) for i in range(n)))
+
+    assert len(asyncio.run(run_all())) == n
+    assert Schalter._scope.fullname == ""
+
+
+def test_scope_isolation_threads():
+    Schalter.clear()
+
+    @Schalter.scoped_configure
+    def foo(*, a):
+        return a
+
+    n = 2000
+    for i in range(n):
+        Schalter["w{}/a".format(i % 8)] = i % 8
+
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        if i < 8:
+            barrier.wait()
+        with Schalter.Scope("w{}".format(i % 8)) as config_scope:
+            for _ in range(10):
+                assert config_scope.fullname == "w{}".format(i % 8)
+                assert foo() == i % 8
+        return True
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(worker, range(n)))
+
+
+def test_scope_shared_instance():
+    Schalter.clear()
+
+    @Schalter.scoped_configure
+    def foo(*, a):
+        return a
+
+    Schalter["S/a"] = 1
+    scope = Schalter.Scope("S")
+    barrier = threading.Barrier(2)
+
+    def worker(i):
+        # exited in a different order than entered
+        with scope:
+            barrier.wait()
+            if i:
+                barrier.wait()
+            assert foo() == 1
+            if not i:
+                barrier.wait()
+        return Schalter._scope.fullname
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(worker, range(2))) == ["", ""]
+
+    async def task():
+        with scope:
+            await asyncio.sleep(0)
+            assert Schalter._scope.fullname == "S"
+        return Schalter._scope.fullname
+
+    async def run_all():
+        return await asyncio.gather(*(task() for _ in range(10)))
+
+    assert asyncio.run(run_all()) == [""] * 10
+    with scope, scope:
+        assert Schalter._scope.fullname == "S/S"
+    assert Schalter._scope.fullname == ""
+
+
+def test_scope_decorator_reentrant():
+    Schalter.clear()
+
+    scope = Schalter.Scope("R")
+
+    @scope
+    def recurse(depth):
+        if depth == 0:
+            return Schalter._scope.fullname
+        return recurse(depth - 1)
+
+    assert recurse(3) == "R/R/R/R"
+    assert Schalter._scope.fullname == ""
+
+
+def test_scope_fallback():
+    Schalter.clear()
+
+    @Schalter.scoped_configure
+    def foo(*, a):
+        return a
+
+    Schalter["a"] = 1
+    Schalter["A/a"] = 2
+
+    with Schalter.Scope("A"), Schalter.Scope("B"):
+        # exact keys only by default
+        with pytest.raises(KeyError):
+            foo()
+
+        Schalter.get_config().set_scope_fallback()
+        assert foo() == 2
+        Schalter["A/B/a"] = 3
+        assert foo() == 3
+
+    with Schalter.Scope("C"):
+        assert foo() == 1
+        foo(a=4)
+        assert Schalter["C/a"] == 4 and Schalter["a"] == 1
+
+    assert foo() == 1
+    Schalter["/a"] = 5
+    assert foo() == 5
+
+    Schalter.get_config().set_scope_fallback(False)
+    with Schalter.Scope("A"), Schalter.Scope("D"):
+        with pytest.raises(KeyError):
+            foo()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import multiprocessing
+import pickle
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from schalter import Schalter
+from schalter.shared_store import SharedConfigStore
+
+
+@pytest.fixture
+def store():
+    s = SharedConfigStore.create({"a": 1, "b/c": [1, 2]}, capacity=8, ring_size=4)
+    yield s
+    s.close()
+    s.unlink()
+
+
+def test_versioned_changes(store):
+    other = pickle.loads(pickle.dumps(store))
+    assert other.to_dict() == {"a": 1, "b/c": [1, 2]}
+    version = other.version
+    assert version == 2
+
+    store.write({"a": 2, "d": "x" * 100})
+    assert other.changes_since(version) == (4, {"a": 2, "d": "x" * 100}, [])
+    assert other.changes_since(4) == (4, {}, [])
+
+    # values are rewritten in place if they fit
+    store.write({"a": 3})
+    store.delete(["d", "unknown"])
+    assert other.changes_since(4) == (6, {"a": 3}, ["d"])
+
+    # fell behind by more than the ring: all entries are compared
+    for i in range(10):
+        store.write({"a": i})
+    assert other.changes_since(6) == (16, {"a": 9}, [])
+    assert other.to_dict() == {"a": 9, "b/c": [1, 2]}
+
+    with pytest.raises(ValueError):
+        store.write({"k{}".format(i): i for i in range(10)})
+    other.close()
+
+
+def test_schalter_on_shared_store(store):
+    Schalter.clear()
+    config = Schalter.get_config()
+
+    @Schalter.configure
+    def foo(*, a):
+        return a
+
+    config.attach_shared_config(store.name)
+    assert foo() == 1
+    assert Schalter["b/c"] == [1, 2]
+
+    changes = []
+    config.subscribe(changes.append)
+    # a write of another process
+    store.write({"a": 5})
+    assert foo() == 5
+    assert changes == [{"a"}]
+
+    Schalter["a"] = 6
+    assert store.to_dict()["a"] == 6
+    assert foo() == 6
+    assert changes[-1] == {"a"} and len(changes) == 2
+    config._shared.close()
+
+
+@Schalter.configure
+def learning_rate(*, lr=0.1):
+    return lr
+
+
+def wait_for_lr(expected):
+    deadline = time.time() + 10
+    while learning_rate() != expected:
+        if time.time() > deadline:
+            return None
+        time.sleep(0.001)
+    return learning_rate()
+
+
+def test_shared_with_spawned_workers():
+    Schalter.clear()
+    config = Schalter.get_config()
+    config.set_default("lr", 0.1)
+    store = config.share_config()
+    try:
+        context = multiprocessing.get_context("spawn")
+        kwargs = Schalter.pool_kwargs()
+        with ProcessPoolExecutor(max_workers=1, mp_context=context, **kwargs) as pool:
+            assert pool.submit(learning_rate).result() == 0.1
+            Schalter["lr"] = 0.01
+            assert pool.submit(wait_for_lr, 0.01).result() == 0.01
+    finally:
+        config._shared.close()
+        store.unlink()
+
+
+def test_attach_from_independent_process(store):
+    # a process with its own resource tracker attaches and exits
+    script = (
+        "from schalter import Schalter\n"
+        "Schalter.get_config().attach_shared_config({!r})\n"
+        "Schalter['a'] = Schalter['a'] + 1\n"
+    ).format(store.name)
+    for _ in range(2):
+        out = subprocess.run(
+            [sys.executable, "-c", script], stderr=subprocess.PIPE, check=True
+        )
+        assert b"Error" not in out.stderr
+    # the segment was not unlinked
+    other = SharedConfigStore(store.name)
+    assert other.to_dict()["a"] == 3
+    other.close()
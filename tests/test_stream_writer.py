@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import datetime
+import io
+import math
+
+import pytest
+from schalter import Schalter
+from schalter import backends
+from schalter.stream_writer import write_yaml
+
+CONFIG = {
+    "a/b": 1,
+    "x": -2.5e-07,
+    "big": 1e300,
+    "inf": float("-inf"),
+    "on": "on",
+    "yes": True,
+    "null": None,
+    "/scoped": "text with: colon # and hash",
+    "quote": 'say "hi"\n\ttab',
+    "unicode": "\u00e4\u00f6\u00fc \U0001F600",
+    "breaks": "line\u2028sep\x85\x00",
+    "empty": "",
+    "number_string": "010",
+    "a/list": [1, "two", [3.0, None]],
+    "a/map": {"k": {"n": False}},
+    "tuple": (1, 2),
+    7: "int key",
+}
+
+
+def parsers():
+    from ruamel.yaml import YAML
+
+    yield YAML(typ="safe", pure=True).load
+    try:
+        yield backends._pyyaml_loads()
+    except ImportError:
+        pass
+
+
+def expected():
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in CONFIG.items()}
+
+
+@pytest.mark.parametrize("flow_style", [False, True])
+@pytest.mark.parametrize("order", ["insertion", "sorted", "grouped"])
+def test_round_trip(order, flow_style):
+    stream = io.StringIO()
+    assert write_yaml(CONFIG, stream, order, flow_style) == len(CONFIG)
+    for load in parsers():
+        assert load(stream.getvalue()) == expected()
+
+
+@pytest.mark.parametrize("flow_style", [False, True])
+def test_round_trip_ruamel_fallback(flow_style):
+    # values that are not formatted directly (YAML timestamps)
+    config = {
+        "date": datetime.date(2020, 1, 2),
+        "dates": [datetime.date(2020, 1, 3), 1],
+        "nested": {"d": {"e": datetime.date(2020, 1, 4)}},
+        "after": 1,
+    }
+    stream = io.StringIO()
+    assert write_yaml(config, stream, flow_style=flow_style) == len(config)
+    from ruamel.yaml import YAML
+
+    assert YAML(typ="safe", pure=True).load(stream.getvalue()) == config
+    if flow_style:
+        assert "dates: [2020-01-03, 1]\n" in stream.getvalue()
+
+
+def test_orders_and_nan():
+    stream = io.StringIO()
+    write_yaml({"b/y": 1, "a": 2, "b/x": 3, "c/z": 4}, stream, "grouped")
+    assert stream.getvalue() == "a: 2\n# b\nb/y: 1\nb/x: 3\n# c\nc/z: 4\n"
+
+    stream = io.StringIO()
+    write_yaml({"b": 1, "a": float("nan"), "c": [1]}, stream, "sorted", True)
+    assert stream.getvalue() == "a: .nan\nb: 1\nc: [1]\n"
+    for load in parsers():
+        assert math.isnan(load(stream.getvalue())["a"])
+
+    with pytest.raises(ValueError):
+        write_yaml({}, stream, "random")
+
+
+def test_stream_config(tmp_path):
+    Schalter.clear()
+    for i in range(1000):
+        Schalter["group{}/key{}".format(i % 10, i)] = i
+    path = tmp_path / "streamed.yaml"
+    assert Schalter.stream_config(path, order="grouped") == 1000
+    config = dict(Schalter.get_config().config)
+
+    Schalter.clear()
+    Schalter.load_config_from_file_default(path)
+    assert Schalter.get_config().config == config
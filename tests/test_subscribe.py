@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import threading
+
+import pytest
+from schalter import Schalter
+from schalter.frozen_store import freeze
+
+
+def test_subscribe_key_and_prefix():
+    Schalter.clear()
+    config = Schalter.get_config()
+    by_key, by_prefix, everything = [], [], []
+    config.subscribe(by_key.append, key="model/size")
+    config.subscribe(by_prefix.append, prefix="model")
+    config.subscribe(everything.append)
+
+    Schalter["model/size"] = 1
+    Schalter["model/layers/n"] = 2
+    Schalter["modelx"] = 3
+    assert by_key == [{"model/size"}]
+    assert by_prefix == [{"model/size"}, {"model/layers/n"}]
+    assert everything == [{"model/size"}, {"model/layers/n"}, {"modelx"}]
+
+    config.delete_subtree("model/layers")
+    assert by_prefix[-1] == {"model/layers/n"}
+
+    config.unsubscribe(by_prefix.append, prefix="model")
+    Schalter["model/size"] = 4
+    assert len(by_prefix) == 3 and len(by_key) == 2
+    with pytest.raises(ValueError):
+        config.unsubscribe(by_prefix.append, prefix="model")
+    with pytest.raises(ValueError):
+        config.subscribe(by_key.append, key="a", prefix="b")
+
+
+def test_notifications_are_batched():
+    Schalter.clear()
+    config = Schalter.get_config()
+    changes = []
+    config.subscribe(changes.append, prefix="a")
+
+    config.set_config("{a/x: 1, a/y: 2, b: 3}")
+    assert changes == [{"a/x", "a/y"}]
+
+    with config.transaction():
+        Schalter["a/x"] = 4
+        with config.transaction():
+            Schalter["a/z"] = 5
+        Schalter["b"] = 6
+        assert len(changes) == 1
+    assert changes == [{"a/x", "a/y"}, {"a/x", "a/z"}]
+
+    # writes of other threads are not held back by a transaction
+    changes.clear()
+    with config.transaction():
+        Schalter["a/x"] = 7
+        thread = threading.Thread(target=Schalter.set, args=("a/w", 8))
+        thread.start()
+        thread.join()
+        assert changes == [{"a/w"}]
+    assert changes == [{"a/w"}, {"a/x"}]
+
+
+def test_notify_attached_store(tmp_path):
+    Schalter.clear()
+    config = Schalter.get_config()
+    Schalter["x"] = 1
+    path = tmp_path / "store.frozen"
+    freeze({"x": 42, "a/y": 2}, path)
+    by_key, by_prefix = [], []
+    config.subscribe(by_key.append, key="x")
+    config.subscribe(by_prefix.append, prefix="a")
+
+    Schalter.attach(path)
+    assert Schalter["x"] == 42
+    assert by_key == [{"x"}] and by_prefix == [{"a/y"}]
+
+
+def test_memoize_with_subscription():
+    Schalter.clear()
+    config = Schalter.get_config()
+    built = []
+
+    @Schalter.configure
+    def build(*, pool_size=2):
+        built.append(pool_size)
+        return ["connection"] * pool_size
+
+    cache = {}
+    config.subscribe(lambda _: cache.clear(), key="pool_size")
+
+    def pool():
+        if "pool" not in cache:
+            cache["pool"] = build()
+        return cache["pool"]
+
+    assert pool() is pool()
+    Schalter["unrelated"] = 1
+    pool()
+    assert built == [2]
+    Schalter["pool_size"] = 3
+    assert len(pool()) == 3
+    assert built == [2, 3]
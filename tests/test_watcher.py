@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+__author__ = """Christoph Rist"""
+__email__ = "c.rist@posteo.de"
+
+import os
+import time
+
+from schalter import Schalter
+from schalter.call_plan import CallPlan
+from schalter.watcher import ConfigWatcher
+
+
+def test_only_update_writes_changed_keys(tmp_path):
+    Schalter.clear()
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\nb: 2\nc: 1\n")
+    assert Schalter.load_config_from_file_default(path) == {"a", "b", "c"}
+
+    config = Schalter.get_config()
+    version = config.version
+    assert Schalter.load_config_from_file_default(path, only_update=True) == set()
+    assert config.version == version
+
+    path.write_text("a: 1\nb: 3\nc: true\nd: 4\n")
+    changes = Schalter.load_config_from_file_default(path, only_update=True)
+    assert changes == {"b", "c", "d"}
+    assert config.config == {"a": 1, "b": 3, "c": True, "d": 4}
+    # a reloaded file keeps its source
+    assert config._provenance.sources() == [str(path)]
+    assert Schalter.origin("d") == (str(path), 4)
+
+
+def test_resolution_cache_survives_unrelated_writes(monkeypatch):
+    Schalter.clear()
+    resolved = []
+    resolve = CallPlan.resolve
+
+    def counting_resolve(*args, **kwargs):
+        resolved.append(1)
+        return resolve(*args, **kwargs)
+
+    monkeypatch.setattr(CallPlan, "resolve", counting_resolve)
+
+    @Schalter.configure
+    def foo(*, a=1):
+        return a
+
+    @Schalter.scoped_configure
+    def bar(*, b):
+        return b
+
+    Schalter["/b"] = 2
+    assert foo() == 1 and bar() == 2
+    assert len(resolved) == 2
+
+    Schalter["unrelated"] = 0
+    assert foo() == 1 and bar() == 2
+    assert len(resolved) == 2
+
+    Schalter["a"] = 3
+    assert foo() == 3 and bar() == 2
+    assert len(resolved) == 3
+
+    Schalter.get_config().delete_subtree("/b")
+    Schalter["/b"] = 4
+    assert bar() == 4
+    assert len(resolved) == 4
+
+
+def test_watcher_reloads_changed_file(tmp_path):
+    Schalter.clear()
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\nb: 2\n")
+    Schalter.load_config_from_file_default(path)
+
+    events = []
+    watcher = ConfigWatcher(
+        Schalter.get_config(), [path], callback=lambda p, c: events.append((p, c))
+    )
+    assert watcher.check() == {}
+
+    path.write_text("a: 1\nb: 5\n")
+    # make sure the modification is visible with coarse timestamps
+    mtime = time.time() + 2
+    os.utime(str(path), (mtime, mtime))
+    assert watcher.check() == {path: {"b"}}
+    assert events == [(path, {"b"})]
+    assert Schalter["b"] == 5
+    assert watcher.check() == {}
+
+    # polling in the background
+    with Schalter.get_config().watch_config_files(path, interval=0.01) as w:
+        path.write_text("a: 7\nb: 5\n")
+        mtime += 2
+        os.utime(str(path), (mtime, mtime))
+        deadline = time.time() + 5
+        while Schalter["a"] != 7 and time.time() < deadline:
+            time.sleep(0.01)
+    assert Schalter["a"] == 7
+    assert w._thread is None